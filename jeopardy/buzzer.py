@@ -0,0 +1,45 @@
+import threading
+import time
+
+from collections import namedtuple
+from queue import Empty, SimpleQueue
+from typing import Callable, List, Optional
+
+
+DEFAULT_FAIRNESS_WINDOW_MILLIS = 50
+
+
+Buzz = namedtuple('Buzz', ['timestamp', 'player_id', 'question_id'])
+
+
+class BuzzArbiter:
+
+    def __init__(self, grant: Callable[[List[Buzz]], None],
+                 fairness_window_millis: int = DEFAULT_FAIRNESS_WINDOW_MILLIS) -> None:
+        self.grant = grant
+        self.fairness_window_ns = fairness_window_millis * 1_000_000
+        # SimpleQueue.put is atomic and never blocks, which keeps the /buzz path lock-free
+        self.buzzes = SimpleQueue()
+        self.thread = threading.Thread(target=self.arbitrate, name='buzz-arbiter', daemon=True)
+        self.thread.start()
+
+    def buzz(self, timestamp: int, player_id: str, question_id: Optional[str]) -> None:
+        self.buzzes.put(Buzz(timestamp, player_id, question_id))
+
+    def arbitrate(self) -> None:
+        while True:
+            first_buzz = self.buzzes.get()
+            # wait out the fairness window so that buzzes which arrived at nearly the same time all get considered
+            remaining_ns = first_buzz.timestamp + self.fairness_window_ns - time.monotonic_ns()
+            if remaining_ns > 0:
+                time.sleep(remaining_ns / 1_000_000_000)
+            buzzes = [first_buzz]
+            while True:
+                try:
+                    buzzes.append(self.buzzes.get_nowait())
+                except Empty:
+                    break
+            try:
+                self.grant(sorted(buzzes))
+            except Exception as e:
+                print(f'Failed to arbitrate buzzes: {e!r}')
@@ -0,0 +1,105 @@
+import os
+import pickle
+import struct
+import threading
+
+from collections import deque
+from typing import Any, List
+
+
+DEFAULT_MAX_PENDING_MESSAGES = 1000
+READ_SIZE = 65536
+# each frame is a length prefix followed by a pickled list of messages
+FRAME_HEADER = struct.Struct('!I')
+
+
+class EventChannel:
+
+    # carries messages from the client app process to the GUI over a pipe. Senders batch up whatever arrives while
+    # a write is in progress, and block (rather than drop messages) when the GUI falls behind. The channel has to
+    # be created before the client app process is forked.
+
+    def __init__(self, max_pending: int = DEFAULT_MAX_PENDING_MESSAGES) -> None:
+        self.reader, self.writer = os.pipe()
+        os.set_blocking(self.reader, False)
+        self.max_pending = max_pending
+        # sender side: messages waiting to go out in the next batch, and whether a sender is writing one
+        self.pending = []
+        self.flushing = False
+        self.condition = threading.Condition()
+        # receiver side: bytes that don't make up a whole frame yet, and messages decoded but not yet received
+        self.buffer = bytearray()
+        self.received = deque()
+
+    def fileno(self) -> int:
+        return self.reader
+
+    @property
+    def backlog(self) -> int:
+        return len(self.received)
+
+    def send(self, message: Any) -> None:
+        with self.condition:
+            while len(self.pending) >= self.max_pending:
+                self.condition.wait()
+            self.pending.append(message)
+            if self.flushing:
+                return  # the sender that's writing will pick this up in its next batch
+            self.flushing = True
+        try:
+            self.flush()
+        except BaseException:
+            with self.condition:
+                self.flushing = False
+                self.condition.notify_all()
+            raise
+
+    def flush(self) -> None:
+        while True:
+            with self.condition:
+                batch, self.pending = self.pending, []
+                if not batch:
+                    self.flushing = False
+                    return
+                self.condition.notify_all()
+            self.write_frame(batch)
+
+    def write_frame(self, batch: List[Any]) -> None:
+        data = pickle.dumps(batch, protocol=pickle.HIGHEST_PROTOCOL)
+        frame = memoryview(FRAME_HEADER.pack(len(data)) + data)
+        # the write end is blocking, so a full pipe holds the sender up until the GUI reads
+        while frame:
+            frame = frame[os.write(self.writer, frame):]
+
+    def receive(self, max_messages: int) -> List[Any]:
+        # only read from the pipe while there's room, so that a GUI that's behind pushes back on the senders
+        while len(self.received) < max_messages:
+            try:
+                chunk = os.read(self.reader, READ_SIZE)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            self.buffer += chunk
+            self.decode()
+            if len(chunk) < READ_SIZE:
+                break
+        messages = []
+        while self.received and len(messages) < max_messages:
+            messages.append(self.received.popleft())
+        return messages
+
+    def decode(self) -> None:
+        offset = 0
+        while len(self.buffer) - offset >= FRAME_HEADER.size:
+            (length,) = FRAME_HEADER.unpack_from(self.buffer, offset)
+            end = offset + FRAME_HEADER.size + length
+            if len(self.buffer) < end:
+                break
+            self.received.extend(pickle.loads(self.buffer[offset + FRAME_HEADER.size:end]))
+            offset = end
+        del self.buffer[:offset]
+
+    def close(self) -> None:
+        os.close(self.reader)
+        os.close(self.writer)
@@ -1,6 +1,7 @@
 import os
 import random
 import subprocess
+import time
 import traceback
 import uuid
 
@@ -82,6 +83,8 @@ class JeopardyCLI:
                         self.show_question(question)
                 elif user_input == '/s':
                     self.show_stats()
+                elif user_input == '/b':
+                    self.client.buzz()
                 elif user_input.startswith('/c '):
                     self.client.chat(user_input[3:])
                 else:
@@ -92,6 +95,13 @@ class JeopardyCLI:
             self.host_says('Goodbye!')
 
     def handle(self, event):
+        if event.event_type == 'BUZZ_GRANTED':
+            is_me = event.player.player_id == self.player_id
+            self.host_says('Go ahead.' if is_me else f'{event.player.nick} has buzzed in.')
+            return
+        if event.event_type == 'ANSWER_SLOT_EXPIRED':
+            self.host_says(f"Sorry, {event.player.nick}, time's up.")
+            return
         if event.player is not None and event.player.player_id == self.player_id:
             return  # don't respond to our own events
         if event.event_type == 'NEW_GAME':
@@ -109,6 +119,10 @@ class JeopardyCLI:
             # TODO handle 'is_close'
             host_response = f'{nick}, that is correct.' if correct else f'No, sorry, {nick}.'
             self.host_says(host_response)
+        elif event.event_type == 'PLAYERS_JOINED':
+            for player_json in event.payload['players']:
+                if player_json['player_id'] != self.player_id:
+                    self.host_says(f'{player_json["nick"]} has joined the game.')
         elif event.event_type in {'NEW_PLAYER', 'PLAYER_LEFT'}:
             nick = event.player.nick
             verb = 'joined' if event.event_type == 'NEW_PLAYER' else 'left'
@@ -118,6 +132,17 @@ class JeopardyCLI:
         elif event.event_type == 'CHAT_MESSAGE':
             nick = event.player.nick
             self.player_says(nick, event.payload['message'])
+        elif event.event_type == 'FINAL_ROUND':
+            self.host_says('Final round!')
+            self.show_question(Question.from_json(event.payload['question']))
+        elif event.event_type == 'FINAL_RESULTS':
+            self.host_says(f'The correct answer is: {event.payload["answer"]}')
+            for result in event.payload['results']:
+                outcome = 'correct' if result['is_correct'] else 'incorrect'
+                answer = f'What is {result["answer"]}? ({outcome}, ${result["wager"]})'
+                self.player_says(result['player']['nick'], answer)
+        elif event.event_type == 'NEW_BOARD':
+            self.host_says(f'A new board is ready: {", ".join(event.payload["categories"])}')
         else:
             print(f'[!!] Received unexpected event: {event}')
 
@@ -164,10 +189,13 @@ class ClientApp(Flask):
         return self.player_id
 
     def notify(self):
+        received = time.time()
         try:
             event = Event.from_request(request)
         except (TypeError, ValueError) as e:
             return error(f'Failed to parse event: {e}')
+        if event.timestamps is not None:
+            event.timestamps['received'] = received
         try:
             self.event_handler.handle(event)
         except Exception:
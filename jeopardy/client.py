@@ -1,11 +1,20 @@
 import os
+import random
+import time
 import uuid
 
-from typing import Any, Optional
+from threading import Lock
+from typing import Any, List, Optional
 
 import requests
 
-from jeopardy.model import AnswerResponse, GameState, Question, RegisterRequest
+from jeopardy.model import AnswerResponse, Board, FinalSubmission, GameState, Question, RegisterRequest
+
+
+RECONNECT_BASE_DELAY_SECONDS = 0.5
+RECONNECT_MAX_ATTEMPTS = 8
+RECONNECT_MAX_DELAY_SECONDS = 30
+REGISTRATION_TIMEOUT_SECONDS = 10
 
 
 class JeopardyClient:
@@ -19,6 +28,11 @@ class JeopardyClient:
         self.server_address = server_address
         self.server_session = requests.Session()
         self.server_session.headers.update({'X-Jeopardy-Player-ID': self.player_id})
+        self.registration = None
+        # only one thread reconnects at a time; the others wait for it, then use its result
+        self.reconnect_lock = Lock()
+        self.reconnect_count = 0
+        self.reconnected = True
 
     def __enter__(self) -> 'JeopardyClient':
         return self
@@ -29,11 +43,44 @@ class JeopardyClient:
     def server_url(self, path: str) -> str:
         return f'http://{self.server_address}{path}'
 
-    def get(self, path: str, *args, **kwargs) -> requests.Response:
-        return self.server_session.get(self.server_url(path), *args, **kwargs)
-
-    def post(self, path: str, *args, **kwargs) -> requests.Response:
-        return self.server_session.post(self.server_url(path), *args, **kwargs)
+    def get(self, path: str, *args, reconnect: bool = True, **kwargs) -> requests.Response:
+        return self.request('GET', path, *args, reconnect=reconnect, **kwargs)
+
+    def post(self, path: str, *args, reconnect: bool = True, **kwargs) -> requests.Response:
+        return self.request('POST', path, *args, reconnect=reconnect, **kwargs)
+
+    def request(self, method: str, path: str, *args, reconnect: bool = True, **kwargs) -> requests.Response:
+        reconnect_count = self.reconnect_count
+        try:
+            return self.server_session.request(method, self.server_url(path), *args, **kwargs)
+        except requests.ConnectionError:
+            if not reconnect or self.registration is None:
+                raise
+        # the server has probably restarted, so register again before retrying
+        self.reconnect(reconnect_count)
+        return self.server_session.request(method, self.server_url(path), *args, **kwargs)
+
+    def reconnect(self, reconnect_count: int) -> None:
+        with self.reconnect_lock:
+            if self.reconnect_count == reconnect_count:
+                self.reconnected = self.try_reconnect()
+                self.reconnect_count += 1
+            # otherwise another thread reconnected (or gave up) since our request was made
+            if not self.reconnected:
+                raise RuntimeError('Failed to reconnect to server')
+
+    def try_reconnect(self) -> bool:
+        for attempt in range(RECONNECT_MAX_ATTEMPTS):
+            # full jitter, so that every client that lost the server at once doesn't come back at once too
+            delay = random.uniform(0, min(RECONNECT_MAX_DELAY_SECONDS, RECONNECT_BASE_DELAY_SECONDS * 2 ** attempt))
+            print(f'Lost connection to server, reconnecting in {delay:.1f}s')
+            time.sleep(delay)
+            try:
+                self.register(self.registration.address, self.registration.nick)
+                return True
+            except (requests.ConnectionError, RuntimeError) as e:
+                print(f'Failed to reconnect to server: {e}')
+        return False
 
     def get_game_state(self) -> Optional[GameState]:
         resp = self.get('/')
@@ -53,28 +100,69 @@ class JeopardyClient:
             player_id=self.player_id,
             nick=nick
         )
-        resp = self.post('/register', json=register_req.to_json())
-        if resp.ok:
-            print('Registered with server')
-        else:
+        resp = self.post('/register', json=register_req.to_json(), reconnect=False)
+        if not resp.ok:
             raise RuntimeError(f'Failed to register with server: {resp.text}')
+        if resp.status_code == 202:
+            self.wait_for_registration()
+        self.registration = register_req
+        print('Registered with server')
+
+    def wait_for_registration(self, timeout: float = REGISTRATION_TIMEOUT_SECONDS) -> None:
+        # the server verifies that it can reach us in the background, so poll until it's done
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            resp = self.get('/register', reconnect=False)
+            if resp.ok:
+                status = resp.json()['status']
+                if status == 'active':
+                    return
+                if status != 'pending':
+                    break
+            time.sleep(0.1)
+        raise RuntimeError('Server failed to connect to client')
 
     def goodbye(self) -> None:
-        self.post('/goodbye')
+        self.post('/goodbye', reconnect=False)
 
     def start_game(self) -> None:
         resp = self.post('/start')
         if not resp.ok:
             raise RuntimeError(f'Failed to start game: {resp.text}')
 
-    def get_question(self) -> Optional[Question]:
-        resp = self.get('/question')
+    def get_question(self, category: Optional[str] = None, min_value: Optional[int] = None) -> Optional[Question]:
+        params = {'category': category, 'min_value': min_value}
+        resp = self.get('/question', params={key: value for key, value in params.items() if value is not None})
         if resp.ok:
             return Question.from_response(resp)
         else:
             print('Failed to get question from server')
             return None
 
+    def get_board(self) -> Optional[Board]:
+        resp = self.get('/board')
+        if resp.ok:
+            return Board.from_response(resp)
+        else:
+            print(f'Failed to get board from server: {resp.text}')
+            return None
+
+    def select_board_cell(self, cell_id: str) -> Optional[Question]:
+        resp = self.post(f'/board/{cell_id}')
+        if resp.ok:
+            return Question.from_response(resp)
+        else:
+            print(f'Failed to select clue from board: {resp.text}')
+            return None
+
+    def search_categories(self, prefix: str) -> List[str]:
+        resp = self.get('/categories', params={'prefix': prefix})
+        if resp.ok:
+            return resp.json()['categories']
+        else:
+            print(f'Failed to search categories: {resp.text}')
+            return []
+
     def answer(self, guess: str) -> Optional[AnswerResponse]:
         resp = self.post('/answer', data=guess)
         if resp.ok:
@@ -87,15 +175,38 @@ class JeopardyClient:
             print(f'Failed to submit answer to server: {resp.text}')
             return None
 
-    def chat(self, message: str) -> None:
+    def buzz(self) -> bool:
+        resp = self.post('/buzz')
+        if not resp.ok:
+            print(f'Failed to buzz in: {resp.text}')
+        return resp.ok
+
+    def start_final_round(self) -> Optional[Question]:
+        resp = self.post('/final')
+        if resp.ok:
+            return Question.from_response(resp)
+        else:
+            print(f'Failed to start final round: {resp.text}')
+            return None
+
+    def submit_final_answer(self, wager: int, answer: str) -> bool:
+        resp = self.post('/final/answer', json=FinalSubmission(wager=wager, answer=answer).to_json())
+        if not resp.ok:
+            print(f'Failed to submit final answer: {resp.text}')
+        return resp.ok
+
+    def chat(self, message: str) -> bool:
         resp = self.post('/chat', data=message)
         if not resp.ok:
             print(f'Failed to post chat message: {resp.text}')
+        return resp.ok
 
     def change_nick(self, new_nick: str) -> bool:
         resp = self.post('/nick', data=new_nick)
         if not resp.ok:
             print(f'Failed to change nick: {resp.text}')
+        elif self.registration is not None:
+            self.registration.nick = new_nick
         return resp.ok
 
     def close(self) -> None:
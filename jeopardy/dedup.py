@@ -0,0 +1,30 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+
+
+DEFAULT_RECENT_QUESTIONS_CAPACITY = 5000
+
+
+class RecentQuestions:
+
+    def __init__(self, capacity: int = DEFAULT_RECENT_QUESTIONS_CAPACITY) -> None:
+        self.capacity = capacity
+        self.source_ids = OrderedDict()
+        self.lock = Lock()
+
+    def __contains__(self, source_id: Optional[str]) -> bool:
+        return source_id is not None and source_id in self.source_ids
+
+    def __len__(self) -> int:
+        return len(self.source_ids)
+
+    def add(self, source_id: Optional[str]) -> None:
+        if source_id is None:
+            return
+        with self.lock:
+            self.source_ids[source_id] = None
+            self.source_ids.move_to_end(source_id)
+            # forget the oldest questions first so memory stays bounded no matter how long the game runs
+            while len(self.source_ids) > self.capacity:
+                self.source_ids.popitem(last=False)
@@ -0,0 +1,88 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from typing import Any, Dict, List, Optional
+
+from flask import Flask, jsonify
+
+from jeopardy.utils.flask_utils import FlaskResponse, error
+
+
+DEFAULT_FIXTURE_FILEPATH = os.path.join(os.path.dirname(__file__), 'data', 'questions.json')
+QUESTIONS_PATH = '/api/v1/questions/random.json'
+
+
+class FakeTrivialBuzz(Flask):
+
+    def __init__(self, questions: List[Dict[str, Any]], latency_millis: int = 0, jitter_millis: int = 0,
+                 error_rate: float = 0.0, padding_bytes: int = 0, *args, **kwargs) -> None:
+        super().__init__('fake-trivialbuzz', *args, **kwargs)
+        if not questions:
+            raise ValueError('Must provide at least one question')
+        self.questions = questions
+        self.latency_millis = latency_millis
+        self.jitter_millis = jitter_millis
+        self.error_rate = error_rate
+        self.padding = 'x' * padding_bytes
+        self.route(QUESTIONS_PATH)(self.random_question)
+
+    def random_question(self) -> FlaskResponse:
+        delay_millis = self.latency_millis + random.uniform(0, self.jitter_millis)
+        if delay_millis > 0:
+            time.sleep(delay_millis / 1000)
+        if random.random() < self.error_rate:
+            return error('Simulated upstream failure', status=503)
+        resp_json = random.choice(self.questions)
+        if self.padding:
+            resp_json = dict(resp_json, padding=self.padding)
+        return jsonify(resp_json)
+
+
+def load_questions(path: str) -> List[Dict[str, Any]]:
+    with open(path) as fixture_file:
+        questions = json.load(fixture_file)
+    # accept either bare question objects or the {"question": {...}} responses the real API returns
+    return [question if 'question' in question else {'question': question} for question in questions]
+
+
+def parse_args(args: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Run a local stand-in for the TrivialBuzz random question API')
+    parser.add_argument('-s', '--server_address', default='127.0.0.1',
+                        help='The IP address on which to run the server')
+    parser.add_argument('-p', '--port', type=int, default=8009,
+                        help='The port on which to run the server')
+    parser.add_argument('-f', '--fixture', default=DEFAULT_FIXTURE_FILEPATH,
+                        help='A JSON file containing the questions to serve')
+    parser.add_argument('-l', '--latency', type=int, default=0,
+                        help='The base latency (in milliseconds) to add to each response')
+    parser.add_argument('-j', '--jitter', type=int, default=0,
+                        help='The maximum random latency (in milliseconds) to add on top of the base latency')
+    parser.add_argument('-e', '--error-rate', type=float, default=0.0,
+                        help='The fraction of requests (between 0 and 1) that should fail with a 503')
+    parser.add_argument('-z', '--padding', type=int, default=0,
+                        help='The number of bytes of padding to add to each response')
+    return parser.parse_args(args)
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    if args is None:
+        args = sys.argv[1:]
+    parsed_args = parse_args(args)
+    app = FakeTrivialBuzz(
+        questions=load_questions(parsed_args.fixture),
+        latency_millis=parsed_args.latency,
+        jitter_millis=parsed_args.jitter,
+        error_rate=parsed_args.error_rate,
+        padding_bytes=parsed_args.padding
+    )
+    print(f'Serving {len(app.questions)} questions at '
+          f'http://{parsed_args.server_address}:{parsed_args.port}{QUESTIONS_PATH}')
+    app.run(host=parsed_args.server_address, port=parsed_args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
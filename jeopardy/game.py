@@ -6,23 +6,46 @@ import string
 import time
 import uuid
 
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor as Pool
 from difflib import SequenceMatcher
+from functools import lru_cache
 from threading import Lock, RLock
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Union
 
 import requests
 
 from nltk.corpus import stopwords
 from nltk.stem.snowball import EnglishStemmer
 
-from jeopardy.model import Event, GameInfo, GameState, NickUpdate, PlayerInfo, Question, RegisterRequest
+from jeopardy.buzzer import Buzz, BuzzArbiter
+from jeopardy.dedup import RecentQuestions
+from jeopardy.grading import GradingPool
+from jeopardy.index import QuestionIndex
+from jeopardy.metrics import CounterChild, MetricsRegistry
+from jeopardy.model import (
+    Board, BoardCell, Event, FinalRound, FinalSubmission, GameInfo, GameState, NickUpdate, PlayerInfo, Question,
+    RegisterRequest
+)
+from jeopardy.packed import PackedQuestionFile
+from jeopardy.store import QuestionStore
+from jeopardy.upstream import UpstreamClient
 from jeopardy.utils.flask_utils import get_player_id
 
 
+ANSWER_SLOT_TIMEOUT_SECONDS = 10
+BOARD_CATEGORIES = 6
+BOARD_VALUES = 5
+DEFAULT_QUESTION_SOURCE_URL = 'http://www.trivialbuzz.com/api/v1/questions/random.json'
+FINAL_ROUND_SECONDS = 30
 MATCH_RATIO_THRESHOLD = 0.75
+MAX_SAMPLING_ATTEMPTS = 5
+MAX_SAMPLING_SECONDS = 3.0
+NOTIFY_TIMEOUT_SECONDS = 5
 QUESTION_TIMEOUT_SECONDS = 30
+REGISTRATION_TIMEOUT_SECONDS = 3
 REMOVE_PUNCTUATION_TRANSLATIONS = {ord(char): None for char in string.punctuation}
+ROSTER_UPDATE_WINDOW_SECONDS = 0.5
 
 ANSWER_RE = re.compile(r'\([^()]*\)|[^()]+')
 URL_RE = re.compile(r'<a[^>]+>(?P<text>[^<]+)</a>')
@@ -35,14 +58,72 @@ class Game:
 
     DEFAULT_FILEPATH = 'jeopardy_game.json'
 
-    def __init__(self, load_from_file: bool = True) -> None:
+    def __init__(self, load_from_file: bool = True, grading_pool: Optional[GradingPool] = None,
+                 question_source_url: Optional[str] = None,
+                 question_store: Optional[Union[QuestionStore, PackedQuestionFile]] = None) -> None:
         self.players = {}
         self.stats = GameInfo()
         self.current_question = None
         self.in_progress = False
         self.lock = RLock()
+        self.stats_lock = Lock()
+        self.player_locks = {}
         self.pool = Pool(8)
+        # registrations are verified on their own pool so that a registration storm can't hold up notifications
+        self.registration_pool = Pool(16)
+        # the next board is built on its own thread, so that a backlog of notifications can't hold it up
+        self.board_pool = Pool(1)
+        self.pending_registrations = {}
+        # players whose latest registration couldn't be verified, until they next ask for its status
+        self.failed_registrations = set()
+        self.joined_players = {}
+        self.roster_lock = Lock()
+        self.grading_pool = grading_pool
+        self.upstream = UpstreamClient(
+            question_source_url or os.getenv('JEOPARDY_QUESTION_SOURCE_URL') or DEFAULT_QUESTION_SOURCE_URL
+        )
+        self.question_store = question_store
+        self.question_index = QuestionIndex(question_store) if question_store is not None else None
+        self.recent_questions = RecentQuestions()
+        self.final_round = None
+        self.presence = None
+        self.board = None
+        self.board_questions = {}
+        self.next_board = None
+        self.buzz_arbiter = None
+        self.answer_slot = None
+        # whether the slot's holder has submitted their answer (which is then being graded)
+        self.answer_slot_used = False
+        # buzzes that lost (or came in while someone was answering), in order, in case the answer is wrong
+        self.waiting_buzzes = deque()
+        self.buzzed_out_players = set()
+        self.current_question_time = None
         self.file_lock = Lock()
+        self.metrics = MetricsRegistry()
+        self.notify_failures = self.metrics.counter(
+            'jeopardy_notify_failures_total', 'Event deliveries to players that failed'
+        )
+        self.timeouts = self.metrics.counter(
+            'jeopardy_timeouts_total', 'Questions, answer slots, final rounds, and notifications that timed out',
+            ['kind']
+        )
+        self.guess_outcomes = self.metrics.counter(
+            'jeopardy_guesses_total', 'Answers graded, by outcome', ['outcome']
+        )
+        self.notifications_queued = CounterChild()
+        self.notifications_sent = CounterChild()
+        self.metrics.gauge(
+            'jeopardy_pool_backlog', 'Events waiting to be (or being) sent out to players',
+            lambda: self.notifications_queued.value - self.notifications_sent.value
+        )
+        self.metrics.gauge(
+            'jeopardy_active_players', 'Players currently in the game',
+            lambda: sum(1 for player in list(self.players.values()) if player.is_active)
+        )
+        self.metrics.gauge(
+            'jeopardy_current_question_age_seconds', 'How long the current question has been open (0 if none)',
+            self.get_current_question_age
+        )
         if load_from_file:
             self.load_game_file()
 
@@ -64,6 +145,42 @@ class Game:
             with open(self.DEFAULT_FILEPATH, 'w') as game_file:
                 json.dump(game, game_file, sort_keys=True, indent=4)
 
+    def request_registration(self, register_req: RegisterRequest) -> None:
+        # accept the registration provisionally; the player is only activated once their client is reachable
+        self.failed_registrations.discard(register_req.player_id)
+        self.pending_registrations[register_req.player_id] = register_req
+        self.registration_pool.submit(self.verify_registration, register_req)
+
+    def verify_registration(self, register_req: RegisterRequest) -> None:
+        try:
+            resp = requests.get(f'http://{register_req.address}/id', timeout=REGISTRATION_TIMEOUT_SECONDS)
+            verified = resp.ok and resp.text == register_req.player_id
+        except requests.RequestException:
+            verified = False
+        try:
+            if verified and self.pending_registrations.get(register_req.player_id) is register_req:
+                self.register_player(register_req)
+                print(f'Added player {register_req.player_id} ({register_req.address})')
+            elif not verified:
+                print(f'Failed to add player {register_req.player_id} ({register_req.address})')
+        finally:
+            if self.pending_registrations.get(register_req.player_id) is register_req:
+                if not verified:
+                    # an active player who moved keeps their old record, so the status can't be read from it
+                    self.failed_registrations.add(register_req.player_id)
+                del self.pending_registrations[register_req.player_id]
+
+    def get_registration_status(self, player_id: str) -> str:
+        if player_id in self.pending_registrations:
+            return 'pending'
+        if player_id in self.failed_registrations:
+            self.failed_registrations.discard(player_id)
+            return 'failed'
+        player = self.get_player(player_id)
+        if player is not None and player.is_active:
+            return 'active'
+        return 'inactive'
+
     def register_player(self, register_req: RegisterRequest) -> None:
         player_id = register_req.player_id
         if player_id in self.players and self.players[player_id].is_active:
@@ -74,7 +191,7 @@ class Game:
             player.last_active_time = datetime.datetime.utcnow()
             if register_req.nick and register_req.nick != player.nick:
                 print(f'Player {player_id} (a/k/a {player.nick}) is now known as {register_req.nick}')
-                self.change_nick(register_req.nick)
+                self.change_nick(register_req.nick, player_id)
             return
         if player_id in self.players:
             player = self.players[player_id]
@@ -90,7 +207,28 @@ class Game:
                 is_active=True
             )
             self.players[player_id] = player
-        event = self.make_event('NEW_PLAYER')
+        player.last_active_time = datetime.datetime.utcnow()
+        if self.presence is not None:
+            self.presence.track(player)
+        self.announce_new_player(player)
+
+    def announce_new_player(self, player: PlayerInfo) -> None:
+        # batch up everyone who joins within a short window (e.g., after a server restart) into a single event
+        with self.roster_lock:
+            self.joined_players[player.player_id] = player
+            if len(self.joined_players) == 1:
+                self.pool.submit(self.flush_joined_players)
+
+    def flush_joined_players(self) -> None:
+        time.sleep(ROSTER_UPDATE_WINDOW_SECONDS)
+        with self.roster_lock:
+            players = list(self.joined_players.values())
+            self.joined_players = {}
+        event = Event(
+            event_type='PLAYERS_JOINED',
+            player=None,
+            payload={'players': [player.to_json() for player in players]}
+        )
         self.notify(event)
 
     def remove_player(self, player_id: str) -> None:
@@ -100,48 +238,200 @@ class Game:
             event = self.make_event('PLAYER_LEFT')
             self.notify(event)
 
+    def expire_player(self, player_id: str) -> None:
+        with self.lock:
+            player = self.get_player(player_id)
+            if player is None or not player.is_active:
+                return
+            player.client_address = None
+            player.is_active = False
+        # there's no request context here, so the event has to be built by hand
+        event = Event(event_type='PLAYER_LEFT', player=player, payload={'reason': 'timeout'})
+        self.notify(event)
+
     def get_player(self, player_id: str) -> Optional[PlayerInfo]:
         return self.players.get(player_id)
 
-    def make_event(self, event_type: str, payload: Optional[Dict[str, Any]] = None) -> Event:
+    def get_player_lock(self, player_id: str) -> Lock:
+        lock = self.player_locks.get(player_id)
+        if lock is None:
+            # setdefault is atomic, so concurrent callers always end up sharing the same lock
+            lock = self.player_locks.setdefault(player_id, Lock())
+        return lock
+
+    def make_event(self, event_type: str, payload: Optional[Dict[str, Any]] = None,
+                   player_id: Optional[str] = None) -> Event:
         if payload is None:
             payload = {}
-        try:
-            player_id = get_player_id()
-        except RuntimeError:
+        if player_id is None:
+            try:
+                player_id = get_player_id()
+            except RuntimeError:
+                pass
+        if player_id is None:
             player = None
         else:
             player = self.get_player(player_id)
             player.last_active_time = datetime.datetime.utcnow()
-        return Event(event_type=event_type, payload=payload, player=player)
+        return Event(event_type=event_type, payload=payload, player=player, timestamps={'created': time.time()})
 
     def notify(self, event: Event) -> None:
-        self.pool.submit(self.notify_players, event)
+        if event.timestamps is None:
+            # events built by hand (i.e., outside of a request) are stamped when they're sent out instead
+            event.timestamps = {'created': time.time()}
+        self.notifications_queued.inc()
+        future = self.pool.submit(self.notify_players, event)
+        future.add_done_callback(lambda _: self.notifications_sent.inc())
 
     def notify_players(self, event: Event) -> None:
         event_json = event.to_json()
+        timestamps = event_json['timestamps']
         for player_id, player in self.players.items():
             if player.is_active:
-                resp = requests.post(f'http://{player.client_address}/notify', json=event_json)
+                # stamp every delivery separately so that the trace shows how far into the fan-out each one was
+                delivery_json = dict(event_json, timestamps=dict(timestamps, sent=time.time()))
+                try:
+                    resp = requests.post(
+                        f'http://{player.client_address}/notify', json=delivery_json, timeout=NOTIFY_TIMEOUT_SECONDS
+                    )
+                except requests.Timeout as e:
+                    self.notify_failures.inc()
+                    self.timeouts.inc('notify')
+                    print(f'Timed out notifying player: {e}')
+                    continue
+                except requests.RequestException as e:
+                    self.notify_failures.inc()
+                    print(f'Failed to notify player: {e}')
+                    continue
                 if not resp.ok:
+                    self.notify_failures.inc()
                     print(f'Failed to notify player: {resp.text}')
 
     def start(self) -> None:
         with self.lock:
             if not self.in_progress:
                 self.notify(self.make_event('NEW_GAME'))
-                question = get_random_question()
+                question = self.get_random_question()
                 if question is None:
                     raise RuntimeError('Failed to fetch starting question')
                 self.in_progress = True
                 self.update_current_question(question)
 
+    def get_random_question(self, category: Optional[str] = None,
+                            min_value: Optional[int] = None) -> Optional[Question]:
+        question = None
+        # the time limit covers every attempt, so that skipping repeats can't keep the request waiting
+        deadline = time.monotonic() + MAX_SAMPLING_SECONDS
+        for _ in range(MAX_SAMPLING_ATTEMPTS):
+            question = self.sample_question(category, min_value, deadline - time.monotonic())
+            if question is None or question.source_id not in self.recent_questions:
+                break
+            if time.monotonic() >= deadline:
+                break
+        # if every sample was a repeat (e.g., when serving from the upstream client's cache), settle for the last one
+        if question is not None:
+            self.recent_questions.add(question.source_id)
+        return question
+
+    def sample_question(self, category: Optional[str] = None, min_value: Optional[int] = None,
+                        timeout_budget: Optional[float] = None) -> Optional[Question]:
+        if category is not None or min_value is not None:
+            if self.question_index is None:
+                raise ValueError('Filtering questions requires a question store')
+            return self.question_index.get_random_question(category, min_value)
+        if self.question_store is not None:
+            return self.question_store.get_random_question()
+        question_data = self.upstream.get_random_question_data(timeout_budget)
+        if question_data is None:
+            return None
+        return parse_question(question_data)
+
+    def get_board(self) -> Optional[Board]:
+        with self.lock:
+            needs_board = self.board is None or self.board.is_complete
+        if needs_board:
+            self.advance_board()
+        return self.board
+
+    def advance_board(self) -> None:
+        # use the board that was built in the background while the last one was played, if it's ready
+        with self.lock:
+            next_board = self.next_board
+            if next_board is not None and next_board.done():
+                self.next_board = None
+        if next_board is not None and next_board.done() and next_board.exception() is None:
+            board, board_questions = next_board.result()
+        else:
+            if next_board is not None and next_board.done():
+                print(f'Failed to build the next board in the background: {next_board.exception()!r}')
+            # otherwise build one now, without holding the lock, so that nothing else has to wait for it
+            board, board_questions = self.build_board()
+        with self.lock:
+            if self.board is not None and not self.board.is_complete:
+                return  # another request got there first
+            self.board = board
+            self.board_questions = board_questions
+            if board is not None:
+                if self.next_board is None:
+                    self.next_board = self.board_pool.submit(self.build_board)
+                self.notify(Event(event_type='NEW_BOARD', player=None, payload=board.to_json()))
+
+    def build_board(self) -> Tuple[Optional[Board], Dict[str, Question]]:
+        if self.question_index is None:
+            return None, {}
+        columns = self.question_index.sample_board(BOARD_CATEGORIES, BOARD_VALUES)
+        if columns is None:
+            return None, {}
+        # fetch the whole board from the question store at once rather than one question at a time
+        record_ids = [record_id for _, column_ids in columns for record_id in column_ids]
+        questions = self.question_store.get_questions(record_ids)
+        if len(questions) != len(record_ids):
+            return None, {}
+        cells = []
+        board_questions = {}
+        for column, (category, _) in enumerate(columns):
+            for row in range(BOARD_VALUES):
+                question = questions[column * BOARD_VALUES + row]
+                cell_id = f'{column}-{row}'
+                cells.append(BoardCell(cell_id=cell_id, category=category, value=question.value))
+                board_questions[cell_id] = question
+        board = Board(
+            board_id=str(uuid.uuid4()),
+            categories=[category for category, _ in columns],
+            cells=cells
+        )
+        return board, board_questions
+
+    def select_board_cell(self, cell_id: str) -> Question:
+        with self.lock:
+            if self.board is None:
+                raise ValueError('There is no board')
+            cell = self.board.get_cell(cell_id)
+            if cell is None:
+                raise ValueError(f'There is no cell {cell_id} on the board')
+            if not cell.is_available:
+                raise ValueError('That clue has already been played')
+            if self.current_question is not None:
+                raise ValueError('There is already an active question')
+            if self.final_round is not None:
+                raise ValueError('The final round is in progress')
+            cell.is_available = False
+            question = self.board_questions.pop(cell_id)
+            self.recent_questions.add(question.source_id)
+            self.update_current_question(question)
+            return question
+
     def update_current_question(self, question: Optional[Question]) -> None:
         with self.lock:
             if self.current_question is None or question is None:
                 self.current_question = question
+                self.current_question_time = time.monotonic() if question is not None else None
+                self.answer_slot = None
+                self.waiting_buzzes.clear()
+                self.buzzed_out_players.clear()
                 if question is not None:
-                    self.stats.questions_asked += 1
+                    with self.stats_lock:
+                        self.stats.questions_asked += 1
                     event = self.make_event(
                         event_type='NEW_QUESTION',
                         payload=question.to_json()
@@ -153,17 +443,38 @@ class Game:
         with self.lock:
             if self.current_question is None:
                 return False, False, 0
+            if self.buzz_in_mode:
+                # use up the slot here, so that an expired slot or a second answer can't be scored
+                if not self.holds_answer_slot(get_player_id()):
+                    raise ValueError('You must buzz in before answering')
+                self.answer_slot_used = True
             question = self.current_question
-        correct, close = check_guess(guess, question.answer)
-        player = self.get_player(get_player_id())
-        player.total_answers += 1
-        self.stats.total_answers += 1
+        correct, close = self.grade_guess(guess, question)
+        correct, close, value = self.score_guess(guess, question, correct, close)
+        # counted after scoring, since a correct answer that loses the race to claim the question is incorrect
+        self.guess_outcomes.inc('correct' if correct else 'close' if close else 'incorrect')
+        return correct, close, value
+
+    def grade_guess(self, guess: str, question: Question) -> Tuple[bool, bool]:
+        if self.grading_pool is None:
+            return check_guess(guess, question.answer, question.answer_key)
+        return self.grading_pool.check_guess(guess, question.answer, question.answer_key)
+
+    def score_guess(self, guess: str, question: Question, correct: bool, close: bool) -> Tuple[bool, bool, int]:
         if correct:
-            player.correct_answers += 1
-            player.score += question.value
-            self.stats.total_correct_answers += 1
-            self.stats.questions_answered += 1
-            self.update_current_question(None)
+            # only the first correct answer claims the question; any others are scored as incorrect
+            correct = self.claim_question(question.question_id)
+        player = self.get_player(get_player_id())
+        with self.get_player_lock(player.player_id):
+            player.total_answers += 1
+            if correct:
+                player.correct_answers += 1
+                player.score += question.value
+        with self.stats_lock:
+            self.stats.total_answers += 1
+            if correct:
+                self.stats.total_correct_answers += 1
+                self.stats.questions_answered += 1
         event = self.make_event(
             event_type='NEW_ANSWER',
             payload={
@@ -174,8 +485,97 @@ class Game:
             }
         )
         self.notify(event)
+        if self.buzz_in_mode:
+            # after the answer is announced, since a wrong one passes the slot to the next player who buzzed
+            self.release_answer_slot(player.player_id, buzzed_out=not correct)
         return correct, close, question.value
 
+    def start_final_round(self) -> Question:
+        with self.lock:
+            if self.final_round is not None:
+                raise ValueError('A final round is already in progress')
+            if self.current_question is not None:
+                raise ValueError('There is already an active question')
+            question = self.get_random_question()
+            if question is None:
+                raise RuntimeError('Failed to fetch final round question')
+            deadline = datetime.datetime.utcnow() + datetime.timedelta(seconds=FINAL_ROUND_SECONDS)
+            final_round = FinalRound(question=question, deadline=deadline, submissions={})
+            self.final_round = final_round
+            with self.stats_lock:
+                self.stats.questions_asked += 1
+        event = self.make_event(
+            event_type='FINAL_ROUND',
+            payload={'question': question.to_json(), 'seconds': FINAL_ROUND_SECONDS}
+        )
+        self.notify(event)
+        self.pool.submit(self.final_round_timeout, final_round)
+        return question
+
+    def submit_final_answer(self, submission: FinalSubmission) -> None:
+        player = self.get_player(get_player_id())
+        if not 0 <= submission.wager <= max(player.score, 0):
+            raise ValueError(f'Wager must be between $0 and ${max(player.score, 0):,}')
+        # under the lock, so that a submission can't land after the round's submissions have been collected
+        with self.lock:
+            final_round = self.final_round
+            if final_round is None or datetime.datetime.utcnow() >= final_round.deadline:
+                raise ValueError('There is no final round in progress')
+            # no event is sent here; everyone finds out how everyone else did from the single results event
+            final_round.submissions[player.player_id] = submission
+
+    def final_round_timeout(self, final_round: FinalRound) -> None:
+        while self.final_round is final_round and datetime.datetime.utcnow() < final_round.deadline:
+            time.sleep(0.1)
+        if self.final_round is final_round:
+            self.timeouts.inc('final_round')
+        self.grade_final_round(final_round)
+
+    def grade_final_round(self, final_round: FinalRound) -> None:
+        with self.lock:
+            if self.final_round is not final_round:
+                return
+            self.final_round = None
+            submissions = list(final_round.submissions.items())
+        question = final_round.question
+        # normalize the correct answer once for the whole batch instead of once per guess
+        answer_key = question.answer_key or normalize_answer(question.answer)
+        guesses = [submission.answer for _, submission in submissions]
+        if self.grading_pool is None:
+            grades = [check_guess(guess, question.answer, answer_key) for guess in guesses]
+        else:
+            grades = self.grading_pool.check_guesses(guesses, question.answer, answer_key)
+
+        results = []
+        for (player_id, submission), (correct, close) in zip(submissions, grades):
+            self.guess_outcomes.inc('correct' if correct else 'close' if close else 'incorrect')
+            player = self.get_player(player_id)
+            with self.get_player_lock(player_id):
+                player.total_answers += 1
+                if correct:
+                    player.correct_answers += 1
+                    player.score += submission.wager
+                else:
+                    player.score -= submission.wager
+            results.append({
+                'answer': submission.answer,
+                'is_correct': correct,
+                'player': player.to_json(),
+                'wager': submission.wager,
+            })
+        with self.stats_lock:
+            self.stats.total_answers += len(results)
+            correct_answers = sum(1 for result in results if result['is_correct'])
+            self.stats.total_correct_answers += correct_answers
+            if correct_answers:
+                self.stats.questions_answered += 1
+        event = Event(
+            event_type='FINAL_RESULTS',
+            player=None,
+            payload={'answer': question.answer, 'results': results}
+        )
+        self.notify(event)
+
     def post_chat_message(self, message: str) -> None:
         event = self.make_event(
             event_type='CHAT_MESSAGE',
@@ -183,8 +583,8 @@ class Game:
         )
         self.notify(event)
 
-    def change_nick(self, new_nick: str) -> None:
-        player = self.get_player(get_player_id())
+    def change_nick(self, new_nick: str, player_id: Optional[str] = None) -> None:
+        player = self.get_player(player_id or get_player_id())
         if not player.is_active:
             return
         old_nick = player.nick
@@ -192,10 +592,98 @@ class Game:
         nick_update = NickUpdate(old_nick, new_nick)
         event = self.make_event(
             event_type='NICK_CHANGED',
-            payload=nick_update.to_json()
+            payload=nick_update.to_json(),
+            player_id=player.player_id
         )
         self.notify(event)
 
+    @property
+    def buzz_in_mode(self) -> bool:
+        return self.buzz_arbiter is not None
+
+    def enable_buzz_in(self, fairness_window_millis: int) -> None:
+        self.buzz_arbiter = BuzzArbiter(self.grant_answer_slot, fairness_window_millis)
+
+    def buzz(self, timestamp: int, player_id: str) -> None:
+        question = self.current_question
+        self.buzz_arbiter.buzz(timestamp, player_id, question.question_id if question is not None else None)
+
+    def grant_answer_slot(self, buzzes: List[Buzz]) -> None:
+        with self.lock:
+            if self.current_question is None:
+                return
+            waiting_players = {buzz.player_id for buzz in self.waiting_buzzes}
+            for buzz in buzzes:
+                if buzz.player_id not in waiting_players:
+                    self.waiting_buzzes.append(buzz)
+                    waiting_players.add(buzz.player_id)
+            if self.answer_slot is None:
+                self.grant_next_answer_slot()
+
+    def grant_next_answer_slot(self) -> None:
+        with self.lock:
+            while self.waiting_buzzes:
+                buzz = self.waiting_buzzes.popleft()
+                if self.is_current_question(buzz.question_id) and buzz.player_id not in self.buzzed_out_players:
+                    break
+            else:
+                return
+            self.answer_slot = buzz
+            self.answer_slot_used = False
+            event = Event(
+                event_type='BUZZ_GRANTED',
+                player=self.get_player(buzz.player_id),
+                payload={'question_id': buzz.question_id}
+            )
+            self.notify(event)
+            self.pool.submit(self.answer_slot_timeout, buzz)
+
+    def holds_answer_slot(self, player_id: str) -> bool:
+        answer_slot = self.answer_slot
+        return (
+            answer_slot is not None
+            and not self.answer_slot_used
+            and answer_slot.player_id == player_id
+            and self.is_current_question(answer_slot.question_id)
+        )
+
+    def release_answer_slot(self, player_id: str, buzzed_out: bool) -> None:
+        with self.lock:
+            if self.answer_slot is not None and self.answer_slot.player_id == player_id:
+                self.answer_slot = None
+                if buzzed_out:
+                    self.buzzed_out_players.add(player_id)
+                self.grant_next_answer_slot()
+
+    def answer_slot_timeout(self, answer_slot: Buzz) -> None:
+        timeout = datetime.datetime.utcnow() + datetime.timedelta(seconds=ANSWER_SLOT_TIMEOUT_SECONDS)
+        while self.answer_slot is answer_slot and not self.answer_slot_used and datetime.datetime.utcnow() < timeout:
+            time.sleep(0.1)
+        with self.lock:
+            # once an answer is in, the slot is released when it's scored instead
+            if self.answer_slot is answer_slot and not self.answer_slot_used:
+                self.timeouts.inc('answer_slot')
+                event = Event(
+                    event_type='ANSWER_SLOT_EXPIRED',
+                    player=self.get_player(answer_slot.player_id),
+                    payload={'question_id': answer_slot.question_id}
+                )
+                self.notify(event)
+                self.release_answer_slot(answer_slot.player_id, buzzed_out=True)
+
+    def claim_question(self, question_id: str) -> bool:
+        with self.lock:
+            if not self.is_current_question(question_id):
+                return False
+            self.current_question = None
+            return True
+
+    def get_current_question_age(self) -> float:
+        question_time = self.current_question_time
+        if self.current_question is None or question_time is None:
+            return 0
+        return time.monotonic() - question_time
+
     def is_current_question(self, question_id: str) -> bool:
         return self.current_question is not None and self.current_question.question_id == question_id
 
@@ -205,6 +693,7 @@ class Game:
             time.sleep(0.1)
         with self.lock:
             if self.is_current_question(question.question_id):
+                self.timeouts.inc('question')
                 self.current_question = None
                 event = self.make_event(
                     event_type='QUESTION_TIMEOUT',
@@ -213,20 +702,14 @@ class Game:
                 self.notify(event)
 
 
-def get_random_question() -> Optional[Question]:
-    resp = requests.get('http://www.trivialbuzz.com/api/v1/questions/random.json')
-    if not resp.ok:
-        return None
-    resp_json = resp.json()
-    if not resp_json:
-        return None
-    question_data = resp_json['question']
+def parse_question(question_data: Dict[str, Any]) -> Question:
     return Question(
         question_id=str(uuid.uuid4()),
         text=sanitize_question(question_data['body'][1:-1]),
         answer=sanitize_answer(question_data['response']),
         category=question_data['category']['name'],
-        value=question_data['value']
+        value=question_data['value'],
+        source_id=str(question_data['id']) if question_data.get('id') is not None else None
     )
 
 
@@ -246,7 +729,7 @@ def sanitize_answer(answer: str) -> str:
     return answer.replace('\\', '').strip()
 
 
-def check_guess(guess: str, correct_answer: str) -> Tuple[bool, bool]:
+def check_guess(guess: str, correct_answer: str, answer_key: Optional[str] = None) -> Tuple[bool, bool]:
     potential_answers = ANSWER_RE.findall(correct_answer)
     if len(potential_answers) == 2:
         for potential_answer in potential_answers:
@@ -260,11 +743,24 @@ def check_guess(guess: str, correct_answer: str) -> Tuple[bool, bool]:
         return True, False
 
     guess_tokens = [process_token(token) for token in guess.split()]
-    processed_answer_tokens = [process_token(token) for token in correct_answer.split()]
-    answer_tokens = [tok for tok in processed_answer_tokens if tok not in stopwords.words('english')]
+    if answer_key is None:
+        answer_key = normalize_answer(correct_answer)
+    # split on an explicit separator so that tokens which were nothing but punctuation are preserved (an empty key
+    # is a single empty token, just like an answer that was nothing but punctuation)
+    answer_tokens = answer_key.split(' ')
     matched = set(guess_tokens).intersection(set(answer_tokens))
     return len(matched) == len(answer_tokens), len(matched) > 0
 
 
+def normalize_answer(answer: str) -> str:
+    processed_answer_tokens = [process_token(token) for token in answer.split()]
+    return ' '.join(tok for tok in processed_answer_tokens if tok not in english_stopwords())
+
+
+@lru_cache(maxsize=None)
+def english_stopwords() -> FrozenSet[str]:
+    return frozenset(stopwords.words('english'))
+
+
 def process_token(token: str) -> str:
     return stemmer.stem(token.lower().translate(REMOVE_PUNCTUATION_TRANSLATIONS))
@@ -0,0 +1,58 @@
+import os
+
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+
+
+DEFAULT_GRADING_TIMEOUT_SECONDS = 5
+
+
+class GradingPool:
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 timeout: float = DEFAULT_GRADING_TIMEOUT_SECONDS) -> None:
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.executor = ProcessPoolExecutor(self.max_workers, initializer=warm_up_worker)
+        self.warm_up()
+
+    def warm_up(self) -> None:
+        # force every worker to start (and load the stemmer and stopwords) before the first guess comes in
+        wait([self.executor.submit(warm_up_worker) for _ in range(self.max_workers)])
+        print(f'Started {self.max_workers} grading worker(s)')
+
+    def check_guess(self, guess: str, correct_answer: str, answer_key: Optional[str] = None) -> Tuple[bool, bool]:
+        try:
+            return self.executor.submit(grade, guess, correct_answer, answer_key).result(timeout=self.timeout)
+        except (BrokenProcessPool, FutureTimeoutError) as e:
+            print(f'Grading pool failed ({e!r}), grading answer inline')
+            return grade(guess, correct_answer, answer_key)
+
+    def check_guesses(self, guesses: List[str], correct_answer: str,
+                      answer_key: Optional[str] = None) -> List[Tuple[bool, bool]]:
+        # grade the whole batch in one task so that it costs a single round trip to the pool
+        try:
+            return self.executor.submit(grade_batch, guesses, correct_answer, answer_key).result(timeout=self.timeout)
+        except (BrokenProcessPool, FutureTimeoutError) as e:
+            print(f'Grading pool failed ({e!r}), grading answers inline')
+            return grade_batch(guesses, correct_answer, answer_key)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False)
+
+
+def warm_up_worker() -> None:
+    from jeopardy.game import english_stopwords, process_token
+    english_stopwords()
+    process_token('warming')
+
+
+def grade(guess: str, correct_answer: str, answer_key: Optional[str] = None) -> Tuple[bool, bool]:
+    from jeopardy.game import check_guess
+    return check_guess(guess, correct_answer, answer_key)
+
+
+def grade_batch(guesses: List[str], correct_answer: str, answer_key: Optional[str] = None) -> List[Tuple[bool, bool]]:
+    from jeopardy.game import check_guess
+    return [check_guess(guess, correct_answer, answer_key) for guess in guesses]
@@ -0,0 +1,217 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, IO, Iterator, List, Optional
+
+from jeopardy.game import normalize_answer, sanitize_answer, sanitize_question
+from jeopardy.store import QuestionRow, QuestionStore
+
+
+DEFAULT_BATCH_SIZE = 2000
+JSON_CHUNK_SIZE = 64 * 1024
+PROGRESS_INTERVAL_SECONDS = 2
+
+
+RawQuestion = Dict[str, Any]
+
+
+def iter_json_array(json_file: IO[str], chunk_size: int = JSON_CHUNK_SIZE) -> Iterator[Any]:
+    # decode one array element at a time so that huge dumps never have to be loaded into memory at once
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    eof = False
+    while True:
+        buffer = buffer.lstrip()
+        if not started:
+            if not buffer and not eof:
+                chunk = json_file.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+            if not buffer.startswith('['):
+                raise ValueError('Expected a JSON array of questions')
+            buffer = buffer[1:]
+            started = True
+            continue
+        if buffer.startswith(','):
+            buffer = buffer[1:]
+            continue
+        if buffer.startswith(']'):
+            return
+        try:
+            value, end = decoder.raw_decode(buffer)
+            if end == len(buffer) and not eof:
+                # a scalar at the very end of the buffer might have been cut off mid-chunk
+                raise json.JSONDecodeError('Incomplete value', buffer, end)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = json_file.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+            continue
+        yield value
+        buffer = buffer[end:]
+
+
+def iter_raw_questions(path: str) -> Iterator[RawQuestion]:
+    _, ext = os.path.splitext(path)
+    with open(path, newline='' if ext == '.csv' else None) as dump_file:
+        if ext == '.csv':
+            yield from csv.DictReader(dump_file)
+        elif ext in {'.jsonl', '.ndjson'}:
+            for line in dump_file:
+                if line.strip():
+                    yield json.loads(line)
+        elif ext == '.json':
+            yield from iter_json_array(dump_file)
+        else:
+            raise ValueError(f'Unsupported file type: {ext} (expected .json, .jsonl, or .csv)')
+
+
+def parse_value(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        value = value.replace('$', '').replace(',', '').strip()
+        if not value or value.lower() == 'none':
+            return 0
+    return int(value)
+
+
+def strip_quotes(text: str) -> str:
+    if len(text) >= 2 and text[0] == text[-1] == "'":
+        return text[1:-1]
+    return text
+
+
+def to_row(raw_question: RawQuestion) -> Optional[QuestionRow]:
+    # accept TrivialBuzz API responses as well as flat clue dumps (e.g., from J! Archive)
+    if isinstance(raw_question.get('question'), dict):
+        raw_question = raw_question['question']
+    category = raw_question.get('category')
+    if isinstance(category, dict):
+        category = category.get('name')
+    text = raw_question.get('body') or raw_question.get('question') or raw_question.get('clue')
+    answer = raw_question.get('response') or raw_question.get('answer')
+    if not text or not answer or not category:
+        return None
+
+    text = sanitize_question(strip_quotes(text))
+    answer = sanitize_answer(answer)
+    category = category.strip()
+    source_id = raw_question.get('id')
+    fingerprint = hashlib.sha1(f'{category.lower()}\0{text.lower()}\0{answer.lower()}'.encode()).hexdigest()
+    return (
+        str(source_id) if source_id not in (None, '') else None,
+        text,
+        answer,
+        normalize_answer(answer),
+        category,
+        parse_value(raw_question.get('value')),
+        fingerprint,
+    )
+
+
+def process_batch(batch: List[RawQuestion]) -> List[QuestionRow]:
+    rows = []
+    for raw_question in batch:
+        try:
+            row = to_row(raw_question)
+        except (AttributeError, TypeError, ValueError):
+            row = None
+        if row is not None:
+            rows.append(row)
+    return rows
+
+
+def iter_batches(raw_questions: Iterator[RawQuestion], batch_size: int) -> Iterator[List[RawQuestion]]:
+    while True:
+        batch = list(islice(raw_questions, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class Importer:
+
+    def __init__(self, store: QuestionStore, workers: Optional[int] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        self.store = store
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.processed = 0
+        self.skipped = 0
+        self.imported = 0
+        self.start_time = None
+        self.last_progress_time = None
+
+    def import_file(self, path: str) -> None:
+        self.start_time = self.last_progress_time = time.monotonic()
+        # only keep a few batches in flight so that memory use doesn't depend on the size of the dump
+        max_in_flight = self.workers * 2
+        in_flight = deque()
+        with ProcessPoolExecutor(self.workers) as executor:
+            for batch in iter_batches(iter_raw_questions(path), self.batch_size):
+                in_flight.append((len(batch), executor.submit(process_batch, batch)))
+                if len(in_flight) >= max_in_flight:
+                    self.store_rows(*in_flight.popleft())
+            while in_flight:
+                self.store_rows(*in_flight.popleft())
+        self.report_progress(final=True)
+
+    def store_rows(self, batch_size: int, future: Future) -> None:
+        self.processed += batch_size
+        self.imported += self.store.insert_many(future.result())
+        self.skipped = self.processed - self.imported
+        if time.monotonic() - self.last_progress_time >= PROGRESS_INTERVAL_SECONDS:
+            self.report_progress()
+
+    def report_progress(self, final: bool = False) -> None:
+        now = time.monotonic()
+        self.last_progress_time = now
+        elapsed = max(now - self.start_time, 1e-6)
+        prefix = 'Done: imported' if final else 'Imported'
+        print(f'{prefix} {self.imported:,} questions ({self.skipped:,} invalid or duplicate) '
+              f'in {elapsed:.1f}s ({self.imported / elapsed:,.0f} questions/s)')
+
+
+def parse_args(args: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Import a dump of "Jeopardy!" clues into a question store')
+    parser.add_argument('paths', nargs='+', metavar='path',
+                        help='The JSON, JSONL, or CSV file(s) to import')
+    parser.add_argument('-d', '--database', default=QuestionStore.DEFAULT_FILEPATH,
+                        help='The question store to import into')
+    parser.add_argument('-w', '--workers', type=int,
+                        help='The number of worker processes to use for sanitizing questions')
+    parser.add_argument('-b', '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='The number of questions to process and insert at a time')
+    return parser.parse_args(args)
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    if args is None:
+        args = sys.argv[1:]
+    parsed_args = parse_args(args)
+    store = QuestionStore(parsed_args.database)
+    try:
+        for path in parsed_args.paths:
+            print(f'Importing {path}')
+            importer = Importer(store, workers=parsed_args.workers, batch_size=parsed_args.batch_size)
+            importer.import_file(path)
+        print(f'{parsed_args.database} now contains {store.count():,} questions')
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+import bisect
+import random
+import string
+
+from array import array
+from collections import defaultdict
+from typing import Iterable, List, Optional, Set, Tuple, Union
+
+from jeopardy.model import Question
+from jeopardy.packed import PackedQuestionFile
+from jeopardy.store import QuestionStore
+
+
+DEFAULT_CATEGORY_SEARCH_LIMIT = 20
+PUNCTUATION_TRANSLATIONS = {ord(char): ' ' for char in string.punctuation}
+
+
+def normalize_category(category: str) -> str:
+    return ' '.join(category.lower().translate(PUNCTUATION_TRANSLATIONS).split())
+
+
+class QuestionIndex:
+
+    def __init__(self, source: Union[QuestionStore, PackedQuestionFile]) -> None:
+        self.source = source
+        # normalized category -> value -> IDs of the matching records in the source
+        self.category_buckets = defaultdict(dict)
+        # value -> IDs of the matching records in the source, across all categories
+        self.value_buckets = {}
+        self.display_names = {}
+        self.token_categories = defaultdict(set)
+        # number of values -> categories with at least that many distinct values (i.e., enough for a board column)
+        self.board_categories = {}
+        self.build(source.iter_categories())
+        self.sorted_categories = sorted(self.category_buckets)
+        self.sorted_tokens = sorted(self.token_categories)
+
+    def build(self, entries: Iterable[Tuple[int, str, int]]) -> None:
+        for record_id, category, value in entries:
+            normalized = normalize_category(category)
+            if normalized not in self.display_names:
+                self.display_names[normalized] = category
+                for token in normalized.split():
+                    self.token_categories[token].add(normalized)
+            buckets = self.category_buckets[normalized]
+            if value not in buckets:
+                buckets[value] = array('L')
+            buckets[value].append(record_id)
+            if value not in self.value_buckets:
+                self.value_buckets[value] = array('L')
+            self.value_buckets[value].append(record_id)
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self.value_buckets.values())
+
+    def search_categories(self, prefix: str, limit: int = DEFAULT_CATEGORY_SEARCH_LIMIT) -> List[str]:
+        prefix = normalize_category(prefix)
+        matches = set(self.prefix_range(self.sorted_categories, prefix, limit))
+        # also match on the start of any word in the category (e.g., "pota" matches "POTENT POTABLES")
+        for token in self.prefix_range(self.sorted_tokens, prefix, limit):
+            matches.update(self.token_categories[token])
+        return sorted(self.display_names[category] for category in matches)[:limit]
+
+    @staticmethod
+    def prefix_range(sorted_keys: List[str], prefix: str, limit: int) -> List[str]:
+        start = bisect.bisect_left(sorted_keys, prefix)
+        end = bisect.bisect_left(sorted_keys, prefix + '\uffff', lo=start)
+        return sorted_keys[start:min(end, start + limit)]
+
+    def match_categories(self, category: str) -> Set[str]:
+        normalized = normalize_category(category)
+        if normalized in self.category_buckets:
+            return {normalized}
+        tokens = normalized.split()
+        if not tokens:
+            return set()
+        return set.intersection(*(self.token_categories.get(token, set()) for token in tokens))
+
+    def sample_board(self, num_categories: int, num_values: int) -> Optional[List[Tuple[str, List[int]]]]:
+        if num_values not in self.board_categories:
+            self.board_categories[num_values] = [
+                category for category, buckets in self.category_buckets.items() if len(buckets) >= num_values
+            ]
+        eligible_categories = self.board_categories[num_values]
+        if len(eligible_categories) < num_categories:
+            return None
+        columns = []
+        for category in random.sample(eligible_categories, num_categories):
+            buckets = self.category_buckets[category]
+            values = sorted(random.sample(list(buckets), num_values))
+            columns.append((self.display_names[category], [random.choice(buckets[value]) for value in values]))
+        return columns
+
+    def get_random_question(self, category: Optional[str] = None,
+                            min_value: Optional[int] = None) -> Optional[Question]:
+        if category is None:
+            buckets = [ids for value, ids in self.value_buckets.items() if min_value is None or value >= min_value]
+        else:
+            buckets = [
+                ids
+                for matched_category in self.match_categories(category)
+                for value, ids in self.category_buckets[matched_category].items()
+                if min_value is None or value >= min_value
+            ]
+        # pick uniformly across every matching record without materializing the matches
+        total = sum(len(ids) for ids in buckets)
+        if total == 0:
+            return None
+        position = random.randrange(total)
+        for ids in buckets:
+            if position < len(ids):
+                return self.source.get_question(ids[position])
+            position -= len(ids)
+        return None
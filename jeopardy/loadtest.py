@@ -0,0 +1,288 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Empty
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from jeopardy.client import JeopardyClient
+from jeopardy.fake_trivialbuzz import DEFAULT_FIXTURE_FILEPATH, load_questions
+from jeopardy.game import parse_question
+from jeopardy.tracing import summarize
+
+
+DEFAULT_BOTS = 100
+DEFAULT_DURATION_SECONDS = 60
+DEFAULT_ANSWER_RATE = 0.5
+DEFAULT_ACCURACY = 0.5
+DEFAULT_CHAT_RATE = 0.1
+RESULTS_GRACE_SECONDS = 60
+WRONG_ANSWERS = ('a platypus', 'the moon', 'Millard Fillmore', 'Lake Titicaca', 'pumpernickel')
+
+
+class BotReceiver(ThreadingHTTPServer):
+
+    # a bare HTTP server that stands in for ClientApp; hundreds of Flask apps per machine would measure Flask,
+    # not the game server
+    daemon_threads = True
+
+    def __init__(self, host: str, player_id: str) -> None:
+        super().__init__((host, 0), BotRequestHandler)
+        self.player_id = player_id
+        self.events_received = 0
+        self.fanout_lags = []
+        self.lock = threading.Lock()
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def record_event(self, event_json: Dict[str, Any]) -> None:
+        received = time.time()
+        timestamps = event_json.get('timestamps') or {}
+        with self.lock:
+            self.events_received += 1
+            if 'created' in timestamps:
+                self.fanout_lags.append(received - timestamps['created'])
+
+
+class BotRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self) -> None:
+        body = self.server.player_id.encode() if self.path == '/id' else b''
+        self.send_response(200 if body else 204)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path == '/notify':
+            try:
+                self.server.record_event(json.loads(body))
+            except ValueError:
+                pass
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class Bot:
+
+    def __init__(self, server_address: str, client_ip: str, nick: str, answers: Dict[str, str],
+                 answer_rate: float, accuracy: float, chat_rate: float) -> None:
+        self.client = JeopardyClient(server_address)
+        self.receiver = BotReceiver(client_ip, self.client.player_id)
+        self.client_ip = client_ip
+        self.nick = nick
+        self.answers = answers
+        self.answer_rate = answer_rate
+        self.accuracy = accuracy
+        self.chat_rate = chat_rate
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.rejected = 0
+        self.correct_answers = 0
+        self.answer_latencies = []
+
+    def request(self, method: str, path: str, **kwargs) -> Optional[requests.Response]:
+        self.requests += 1
+        try:
+            resp = self.client.request(method, path, reconnect=False, **kwargs)
+        except requests.RequestException:
+            self.errors += 1
+            return None
+        if resp.status_code == 429:
+            self.throttled += 1
+        elif 400 <= resp.status_code < 500:
+            # mostly answers to questions someone else already got, which is expected in a busy room
+            self.rejected += 1
+        elif not resp.ok:
+            self.errors += 1
+        return resp
+
+    def run(self, deadline: float) -> None:
+        threading.Thread(target=self.receiver.serve_forever, daemon=True).start()
+        try:
+            self.requests += 1
+            self.client.register(f'{self.client_ip}:{self.receiver.port}', self.nick)
+            self.request('POST', '/start')
+            next_answer = time.monotonic() + random.expovariate(self.answer_rate) if self.answer_rate > 0 else deadline
+            next_chat = time.monotonic() + random.expovariate(self.chat_rate) if self.chat_rate > 0 else deadline
+            while True:
+                now = time.monotonic()
+                if min(next_answer, next_chat) >= deadline:
+                    time.sleep(max(deadline - now, 0))
+                    break
+                if next_answer <= next_chat:
+                    time.sleep(max(next_answer - now, 0))
+                    self.answer()
+                    next_answer += random.expovariate(self.answer_rate)
+                else:
+                    time.sleep(max(next_chat - now, 0))
+                    self.request('POST', '/chat', data=f'{self.nick} says hi')
+                    next_chat += random.expovariate(self.chat_rate)
+        except (RuntimeError, requests.RequestException) as e:
+            print(f'Bot {self.nick} failed: {e}')
+            self.errors += 1
+        finally:
+            try:
+                self.client.close()
+            except requests.RequestException:
+                pass
+            self.receiver.shutdown()
+            self.receiver.server_close()
+
+    def answer(self) -> None:
+        resp = self.request('GET', '/question')
+        if resp is None or not resp.ok or not resp.json():
+            return
+        answer = self.answers.get(resp.json()['text'])
+        if answer is None or random.random() >= self.accuracy:
+            answer = random.choice(WRONG_ANSWERS)
+        start = time.perf_counter()
+        resp = self.request('POST', '/answer', data=answer)
+        if resp is not None and resp.ok:
+            self.answer_latencies.append(time.perf_counter() - start)
+            if resp.json()['is_correct']:
+                self.correct_answers += 1
+
+    def get_results(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'throttled': self.throttled,
+            'rejected': self.rejected,
+            'correct_answers': self.correct_answers,
+            'answer_latencies': self.answer_latencies,
+            'events_received': self.receiver.events_received,
+            'fanout_lags': self.receiver.fanout_lags,
+        }
+
+
+def load_answers(path: str) -> Dict[str, str]:
+    # bots look answers up by question text, which only works against a question source serving this fixture
+    answers = {}
+    for question_json in load_questions(path):
+        question = parse_question(question_json['question'])
+        answers[question.text] = question.answer
+    return answers
+
+
+def run_bots(process_index: int, num_bots: int, parsed_args: argparse.Namespace,
+             results: multiprocessing.Queue) -> None:
+    answers = load_answers(parsed_args.fixture)
+    bots = [
+        Bot(parsed_args.server_address, parsed_args.client_ip, f'bot{process_index:02d}-{bot_index:03d}', answers,
+            parsed_args.answer_rate, parsed_args.accuracy, parsed_args.chat_rate)
+        for bot_index in range(num_bots)
+    ]
+    deadline = time.monotonic() + parsed_args.duration
+    threads = [threading.Thread(target=bot.run, args=(deadline,), daemon=True) for bot in bots]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put([bot.get_results() for bot in bots])
+
+
+def report(bot_results: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    totals = {
+        key: sum(result[key] for result in bot_results)
+        for key in ('requests', 'errors', 'throttled', 'rejected', 'correct_answers', 'events_received')
+    }
+    answer_latencies = [latency for result in bot_results for latency in result['answer_latencies']]
+    fanout_lags = [lag for result in bot_results for lag in result['fanout_lags']]
+    return {
+        'bots': len(bot_results),
+        'elapsed_seconds': elapsed,
+        **totals,
+        'requests_per_second': totals['requests'] / elapsed,
+        'events_per_second': totals['events_received'] / elapsed,
+        'answer_latency': summarize(answer_latencies),
+        'fanout_lag': summarize(fanout_lags),
+    }
+
+
+def print_report(summary: Dict[str, Any]) -> None:
+    print(f'{summary["bots"]} bots ran for {summary["elapsed_seconds"]:.1f}s')
+    print(f'Requests: {summary["requests"]:,} ({summary["requests_per_second"]:,.1f}/s), '
+          f'{summary["errors"]:,} errors, {summary["throttled"]:,} rate-limited, {summary["rejected"]:,} rejected')
+    print(f'Correct answers: {summary["correct_answers"]:,}')
+    print(f'Events received: {summary["events_received"]:,} ({summary["events_per_second"]:,.1f}/s)')
+    for name in ('answer_latency', 'fanout_lag'):
+        stats = summary[name]
+        print(f'{name.replace("_", " ").capitalize()}: '
+              + ', '.join(f'{key} {stats[key] * 1000:.1f}ms' for key in ('p50', 'p90', 'p99', 'max') if key in stats))
+
+
+def parse_args(args: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Load-test a "Jeopardy!" server with a room full of bots')
+    parser.add_argument('-s', '--server-address', default='127.0.0.1:8008',
+                        help='The IP and port of the server to test')
+    parser.add_argument('-c', '--client-address', dest='client_ip', default='127.0.0.1',
+                        help='The IP for the server to connect to in order to send events to the bots')
+    parser.add_argument('-n', '--bots', type=int, default=DEFAULT_BOTS,
+                        help='The number of bots to run')
+    parser.add_argument('-P', '--processes', type=int, default=os.cpu_count() or 1,
+                        help='The number of processes to spread the bots across')
+    parser.add_argument('-d', '--duration', type=float, default=DEFAULT_DURATION_SECONDS,
+                        help='How long (in seconds) to run the bots for')
+    parser.add_argument('-a', '--answer-rate', type=float, default=DEFAULT_ANSWER_RATE,
+                        help='The average number of answers per second each bot submits')
+    parser.add_argument('-x', '--accuracy', type=float, default=DEFAULT_ACCURACY,
+                        help='The fraction of answers each bot gets right')
+    parser.add_argument('-r', '--chat-rate', type=float, default=DEFAULT_CHAT_RATE,
+                        help='The average number of chat messages per second each bot sends')
+    parser.add_argument('-f', '--fixture', default=DEFAULT_FIXTURE_FILEPATH,
+                        help='The fixture file the server\'s question source is serving (used to look up answers)')
+    parser.add_argument('-o', '--output',
+                        help='A file to write the results to as JSON')
+    return parser.parse_args(args)
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    if args is None:
+        args = sys.argv[1:]
+    parsed_args = parse_args(args)
+    num_processes = max(1, min(parsed_args.processes, parsed_args.bots))
+    results = multiprocessing.Queue()
+    processes = []
+    for process_index in range(num_processes):
+        # spread the bots as evenly as possible
+        num_bots = parsed_args.bots // num_processes + (process_index < parsed_args.bots % num_processes)
+        process = multiprocessing.Process(target=run_bots, args=(process_index, num_bots, parsed_args, results))
+        processes.append(process)
+    start = time.monotonic()
+    for process in processes:
+        process.start()
+    bot_results = []
+    for _ in processes:
+        try:
+            bot_results.extend(results.get(timeout=parsed_args.duration + RESULTS_GRACE_SECONDS))
+        except Empty:
+            print('Timed out waiting for a bot process to report its results')
+    elapsed = time.monotonic() - start
+    for process in processes:
+        process.join()
+
+    summary = report(bot_results, elapsed)
+    print_report(summary)
+    if parsed_args.output:
+        with open(parsed_args.output, 'w') as output_file:
+            json.dump(summary, output_file, sort_keys=True, indent=4)
+
+
+if __name__ == '__main__':
+    main()
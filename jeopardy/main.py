@@ -9,6 +9,7 @@ from typing import Any, List, Optional
 from jeopardy.model import ClientConfig
 from jeopardy.server import MAX_NICK_LENGTH
 from jeopardy.ui import JeopardyApp
+from jeopardy.utils.arg_utils import positive_int
 
 
 class JeopardyMain:
@@ -24,6 +25,9 @@ class JeopardyMain:
         self._client_ip = parsed_args.client_ip
         self._client_port = parsed_args.client_port
         self._dark_mode = parsed_args.dark_mode or None
+        self._trace_file = parsed_args.trace_file
+        self._scrollback = parsed_args.scrollback
+        self._archive_file = parsed_args.archive_file
         self._player_id = None
         self.app = None
 
@@ -46,6 +50,12 @@ class JeopardyMain:
                             help='The port for the server to connect to in order to send events')
         parser.add_argument('-d', '--dark', '--dark-mode', action='store_true', dest='dark_mode',
                             help='Use the dark theme for the GUI')
+        parser.add_argument('-t', '--trace-file',
+                            help='A file to write event latency percentiles (by stage) to when the game is closed')
+        parser.add_argument('-b', '--scrollback', type=positive_int,
+                            help='The number of events to keep in the event pane (older ones are trimmed)')
+        parser.add_argument('-a', '--archive', '--archive-file', dest='archive_file',
+                            help='A file to append events trimmed from the event pane to')
         return parser.parse_args(args)
 
     @property
@@ -94,6 +104,29 @@ class JeopardyMain:
                 self._dark_mode = bool(dark_mode)
         return self._dark_mode
 
+    @property
+    def trace_file(self) -> Optional[str]:
+        if self._trace_file is None:
+            self._trace_file = self.get_config_value('JEOPARDY_TRACE_FILE', None)
+        return self._trace_file
+
+    @property
+    def scrollback(self) -> Optional[int]:
+        if self._scrollback is None:
+            scrollback = self.get_config_value('JEOPARDY_SCROLLBACK', None)
+            if scrollback is not None:
+                try:
+                    self._scrollback = positive_int(scrollback)
+                except (ValueError, argparse.ArgumentTypeError) as e:
+                    print(f'Ignoring JEOPARDY_SCROLLBACK: {e}')
+        return self._scrollback
+
+    @property
+    def archive_file(self) -> Optional[str]:
+        if self._archive_file is None:
+            self._archive_file = self.get_config_value('JEOPARDY_ARCHIVE_FILE', None)
+        return self._archive_file
+
     @property
     def client_config(self) -> ClientConfig:
         return ClientConfig(
@@ -130,7 +163,10 @@ class JeopardyMain:
             client_port=self.client_port,
             player_id=self.player_id,
             nick=self.nick,
-            dark_mode=self.dark_mode
+            dark_mode=self.dark_mode,
+            trace_file=self.trace_file,
+            scrollback=self.scrollback,
+            archive_file=self.archive_file
         )
         try:
             self.app.run()
@@ -0,0 +1,195 @@
+import bisect
+import time
+
+from functools import wraps
+from threading import Lock
+from typing import Callable, List, Sequence, Tuple, Union
+
+from flask import Flask
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def format_labels(label_names: Sequence[str], label_values: Sequence[str], **extra_labels: str) -> str:
+    pairs = [*zip(label_names, label_values), *extra_labels.items()]
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class CounterChild:
+
+    def __init__(self) -> None:
+        self.value = 0
+        self.lock = Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self.lock:
+            self.value += amount
+
+
+class Counter:
+
+    kind = 'counter'
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.children = {}
+        self.lock = Lock()
+
+    def labels(self, *label_values: str) -> CounterChild:
+        # look children up once and hold on to them so that the hot path never touches the dict
+        child = self.children.get(label_values)
+        if child is None:
+            with self.lock:
+                child = self.children.setdefault(label_values, CounterChild())
+        return child
+
+    def inc(self, *label_values: str, amount: int = 1) -> None:
+        self.labels(*label_values).inc(amount)
+
+    def render(self) -> List[str]:
+        return [
+            f'{self.name}{format_labels(self.label_names, label_values)} {format_value(child.value)}'
+            for label_values, child in sorted(self.children.items())
+        ]
+
+
+class Gauge:
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, description: str, function: Callable[[], float]) -> None:
+        # gauges are read when they're scraped rather than kept up to date
+        self.name = name
+        self.description = description
+        self.function = function
+
+    def render(self) -> List[str]:
+        return [f'{self.name} {format_value(self.function())}']
+
+
+class CallbackCounter(Gauge):
+
+    kind = 'counter'
+
+
+class HistogramChild:
+
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        # per-bucket (not cumulative) counts, with one extra for +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.lock = Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram:
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self.children = {}
+        self.lock = Lock()
+
+    def labels(self, *label_values: str) -> HistogramChild:
+        child = self.children.get(label_values)
+        if child is None:
+            with self.lock:
+                child = self.children.setdefault(label_values, HistogramChild(self.buckets))
+        return child
+
+    def observe(self, value: float, *label_values: str) -> None:
+        self.labels(*label_values).observe(value)
+
+    def render(self) -> List[str]:
+        lines = []
+        for label_values, child in sorted(self.children.items()):
+            with child.lock:
+                counts = list(child.counts)
+                total = child.sum
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float('inf')), counts):
+                cumulative += count
+                labels = format_labels(self.label_names, label_values, le=format_value(bound))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = format_labels(self.label_names, label_values)
+            lines.append(f'{self.name}_sum{labels} {format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+
+    def __init__(self) -> None:
+        self.metrics = {}
+
+    def register(self, metric: Union[Counter, Gauge, Histogram]) -> Union[Counter, Gauge, Histogram]:
+        if metric.name in self.metrics:
+            raise ValueError(f'Metric {metric.name} is already registered')
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str, label_names: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, description, label_names))
+
+    def callback_counter(self, name: str, description: str, function: Callable[[], float]) -> CallbackCounter:
+        return self.register(CallbackCounter(name, description, function))
+
+    def gauge(self, name: str, description: str, function: Callable[[], float]) -> Gauge:
+        return self.register(Gauge(name, description, function))
+
+    def histogram(self, name: str, description: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, description, label_names, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f'# HELP {name} {metric.description}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                print(f'Failed to collect metric {name}: {e!r}')
+        return '\n'.join(lines) + '\n'
+
+
+def instrument_routes(app: Flask, histogram: Histogram) -> None:
+    # wrap the view functions themselves (rather than using before/after_request hooks) so that timing a
+    # request costs two clock reads and one locked increment
+    for endpoint, view in list(app.view_functions.items()):
+        app.view_functions[endpoint] = timed(view, histogram.labels(endpoint))
+
+
+def timed(view: Callable, child: HistogramChild) -> Callable:
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return view(*args, **kwargs)
+        finally:
+            child.observe(time.perf_counter() - start)
+    return wrapper
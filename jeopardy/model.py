@@ -1,7 +1,7 @@
 import datetime
 
 from dataclasses import dataclass
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 
 class Model:
@@ -101,13 +101,61 @@ class Question(Model):
     answer: str
     category: str
     value: int
+    source_id: str = None
+    answer_key: str = None
 
     def to_json(self):
         json = super().to_json()
         json['answer'] = ''
+        json['answer_key'] = None
         return json
 
 
+@dataclass
+class BoardCell(Model):
+    cell_id: str
+    category: str
+    value: int
+    is_available: bool = True
+
+
+@dataclass
+class Board(Model):
+    board_id: str
+    categories: List[str]
+    cells: List[BoardCell]
+
+    @classmethod
+    def from_json(cls, json):
+        json = dict(json, cells=[BoardCell.from_json(cell) for cell in json['cells']])
+        return super().from_json(json)
+
+    def to_json(self):
+        json = super().to_json()
+        json['cells'] = [cell.to_json() for cell in self.cells]
+        return json
+
+    def get_cell(self, cell_id: str) -> Optional[BoardCell]:
+        return next((cell for cell in self.cells if cell.cell_id == cell_id), None)
+
+    @property
+    def is_complete(self) -> bool:
+        return not any(cell.is_available for cell in self.cells)
+
+
+@dataclass
+class FinalSubmission(Model):
+    wager: int
+    answer: str
+
+
+@dataclass
+class FinalRound(Model):
+    question: Question
+    deadline: datetime.datetime
+    submissions: Dict[str, FinalSubmission]
+
+
 @dataclass
 class AnswerResponse(Model):
     is_correct: bool
@@ -126,6 +174,7 @@ class Event(Model):
     event_type: str
     player: PlayerInfo
     payload: Dict[str, Any]
+    timestamps: Dict[str, float] = None
 
 
 @dataclass
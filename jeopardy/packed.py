@@ -0,0 +1,156 @@
+import argparse
+import mmap
+import os
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import uuid
+
+from array import array
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from jeopardy.model import Question
+from jeopardy.store import QuestionRow, QuestionStore
+
+
+# A packed question file is a header, then a table of N + 1 offsets, then N packed records. Records are
+# only decoded when they are sampled, and since the file is mapped rather than read, every process that
+# opens it shares the same page-cached copy.
+EXTENSION = '.jpq'
+MAGIC = b'JPQ1'
+HEADER = struct.Struct('<4sQ')  # magic, number of questions
+OFFSET = struct.Struct('<Q')
+VALUE = struct.Struct('<i')
+LENGTH = struct.Struct('<I')
+
+# the string fields of each record, in the order they are packed
+STRING_FIELDS = ('source_id', 'text', 'answer', 'answer_key', 'category')
+
+
+class PackedQuestionFile:
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, 'rb') as packed_file:
+            # an empty file can't be mapped at all, so check that there's at least a header first
+            size = os.fstat(packed_file.fileno()).st_size
+            if size < HEADER.size:
+                raise ValueError(f'{path} is not a packed question file (it is only {size:,} bytes)')
+            self.mmap = mmap.mmap(packed_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self.mmap, 0)
+        if magic != MAGIC:
+            self.mmap.close()
+            raise ValueError(f'{path} is not a packed question file')
+        self.records_start = HEADER.size + (self.count + 1) * OFFSET.size
+        # the last offset is the end of the last record, which a truncated file won't reach
+        if size < self.records_start \
+                or size < self.records_start + OFFSET.unpack_from(self.mmap, self.records_start - OFFSET.size)[0]:
+            self.mmap.close()
+            raise ValueError(f'{path} is truncated (it is only {size:,} bytes)')
+
+    def __len__(self) -> int:
+        return self.count
+
+    def get_question(self, index: int) -> Question:
+        if not 0 <= index < self.count:
+            raise IndexError(f'Question index out of range: {index}')
+        (start,) = OFFSET.unpack_from(self.mmap, HEADER.size + index * OFFSET.size)
+        position = self.records_start + start
+        (value,) = VALUE.unpack_from(self.mmap, position)
+        position += VALUE.size
+        fields = {}
+        for field in STRING_FIELDS:
+            (length,) = LENGTH.unpack_from(self.mmap, position)
+            position += LENGTH.size
+            fields[field] = self.mmap[position:position + length].decode('utf-8')
+            position += length
+        return Question(
+            question_id=str(uuid.uuid4()),
+            value=value,
+            text=fields['text'],
+            answer=fields['answer'],
+            category=fields['category'],
+            source_id=fields['source_id'] or f'packed:{index}',
+            answer_key=fields['answer_key']
+        )
+
+    def get_questions(self, indices: List[int]) -> List[Question]:
+        return [self.get_question(index) for index in indices]
+
+    def iter_categories(self) -> Iterator[Tuple[int, str, int]]:
+        for index in range(self.count):
+            (start,) = OFFSET.unpack_from(self.mmap, HEADER.size + index * OFFSET.size)
+            position = self.records_start + start
+            (value,) = VALUE.unpack_from(self.mmap, position)
+            position += VALUE.size
+            # skip over every string field except the category, which is packed last
+            for _ in range(len(STRING_FIELDS) - 1):
+                (length,) = LENGTH.unpack_from(self.mmap, position)
+                position += LENGTH.size + length
+            (length,) = LENGTH.unpack_from(self.mmap, position)
+            position += LENGTH.size
+            yield index, self.mmap[position:position + length].decode('utf-8'), value
+
+    def get_random_question(self) -> Optional[Question]:
+        if self.count == 0:
+            return None
+        return self.get_question(random.randrange(self.count))
+
+    def close(self) -> None:
+        self.mmap.close()
+
+
+def pack_record(row: QuestionRow) -> bytes:
+    source_id, text, answer, answer_key, category, value, _ = row
+    parts = [VALUE.pack(value)]
+    for field in (source_id or '', text, answer, answer_key, category):
+        encoded = field.encode('utf-8')
+        parts.append(LENGTH.pack(len(encoded)))
+        parts.append(encoded)
+    return b''.join(parts)
+
+
+def write_packed_file(path: str, rows: Iterable[QuestionRow]) -> int:
+    # records are spooled to a temporary file so that only the offset table is held in memory
+    offsets = array('Q', [0])
+    with tempfile.TemporaryFile() as records_file:
+        for row in rows:
+            offsets.append(offsets[-1] + records_file.write(pack_record(row)))
+        count = len(offsets) - 1
+        records_file.seek(0)
+        with open(path, 'wb') as packed_file:
+            packed_file.write(HEADER.pack(MAGIC, count))
+            if sys.byteorder != 'little':
+                offsets.byteswap()
+            offsets.tofile(packed_file)
+            shutil.copyfileobj(records_file, packed_file)
+    return count
+
+
+def parse_args(args: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Pack a question store into a compact, memory-mappable file')
+    parser.add_argument('output', help='The packed question file to write')
+    parser.add_argument('-d', '--database', default=QuestionStore.DEFAULT_FILEPATH,
+                        help='The question store to pack')
+    return parser.parse_args(args)
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    if args is None:
+        args = sys.argv[1:]
+    parsed_args = parse_args(args)
+    if not os.path.exists(parsed_args.database):
+        print(f'Question store {parsed_args.database} does not exist')
+        sys.exit(1)
+    store = QuestionStore(parsed_args.database)
+    try:
+        count = write_packed_file(parsed_args.output, store.iter_rows())
+    finally:
+        store.close()
+    print(f'Packed {count:,} questions into {parsed_args.output} ({os.path.getsize(parsed_args.output):,} bytes)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+import datetime
+import heapq
+
+from concurrent.futures import ThreadPoolExecutor as Pool
+from threading import Event, Lock, Thread
+
+import requests
+
+from jeopardy.game import Game
+from jeopardy.model import PlayerInfo
+
+
+DEFAULT_IDLE_TIMEOUT_SECONDS = 300
+DEFAULT_SWEEP_INTERVAL_SECONDS = 5
+PING_TIMEOUT_SECONDS = 2
+
+
+class PresenceSweeper:
+
+    def __init__(self, game: Game, idle_timeout: int = DEFAULT_IDLE_TIMEOUT_SECONDS,
+                 sweep_interval: int = DEFAULT_SWEEP_INTERVAL_SECONDS) -> None:
+        self.game = game
+        self.idle_timeout = datetime.timedelta(seconds=idle_timeout)
+        self.sweep_interval = sweep_interval
+        # (expiration time, player ID) pairs; entries are checked against last_active_time when they come due,
+        # so activity never has to touch the heap
+        self.expirations = []
+        self.tracked_players = set()
+        self.lock = Lock()
+        self.ping_pool = Pool(4)
+        self.stopped = Event()
+        self.thread = Thread(target=self.run, name='presence-sweeper', daemon=True)
+
+    def start(self) -> None:
+        with self.game.lock:
+            for player in self.game.players.values():
+                if player.is_active:
+                    self.track(player)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.ping_pool.shutdown(wait=False)
+
+    def track(self, player: PlayerInfo) -> None:
+        if player.last_active_time is None:
+            player.last_active_time = datetime.datetime.utcnow()
+        with self.lock:
+            if player.player_id not in self.tracked_players:
+                self.tracked_players.add(player.player_id)
+                heapq.heappush(self.expirations, (player.last_active_time + self.idle_timeout, player.player_id))
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f'Failed to sweep idle players: {e!r}')
+
+    def sweep(self) -> None:
+        now = datetime.datetime.utcnow()
+        due_player_ids = []
+        with self.lock:
+            while self.expirations and self.expirations[0][0] <= now:
+                _, player_id = heapq.heappop(self.expirations)
+                due_player_ids.append(player_id)
+
+        idle_players = []
+        for player_id in due_player_ids:
+            player = self.game.get_player(player_id)
+            if player is None or not player.is_active:
+                self.untrack(player_id)
+            elif player.last_active_time + self.idle_timeout > now:
+                self.reschedule(player, player.last_active_time + self.idle_timeout)
+            else:
+                idle_players.append(player)
+
+        # idle players get one last ping before being dropped, so that quiet (but connected) players can stay
+        for player, alive in zip(idle_players, self.ping_pool.map(self.ping, idle_players)):
+            if alive:
+                player.last_active_time = datetime.datetime.utcnow()
+                self.reschedule(player, player.last_active_time + self.idle_timeout)
+            else:
+                print(f'Player {player.player_id} ({player.nick}) has gone away')
+                self.untrack(player.player_id)
+                self.game.expire_player(player.player_id)
+
+    def reschedule(self, player: PlayerInfo, expires_at: datetime.datetime) -> None:
+        with self.lock:
+            heapq.heappush(self.expirations, (expires_at, player.player_id))
+
+    def untrack(self, player_id: str) -> None:
+        with self.lock:
+            self.tracked_players.discard(player_id)
+
+    @staticmethod
+    def ping(player: PlayerInfo) -> bool:
+        address = player.client_address
+        if address is None:
+            return False
+        try:
+            resp = requests.get(f'http://{address}/id', timeout=PING_TIMEOUT_SECONDS)
+        except requests.RequestException:
+            return False
+        return resp.ok and resp.text == player.player_id
@@ -0,0 +1,73 @@
+import os
+import sys
+import threading
+import time
+
+from collections import Counter
+from types import FrameType
+from typing import Optional
+
+
+DEFAULT_PROFILE_SECONDS = 10
+DEFAULT_SAMPLE_INTERVAL_SECONDS = 0.005
+MAX_PROFILE_SECONDS = 300
+
+
+def format_frame(frame: FrameType) -> str:
+    code = frame.f_code
+    # use the line the function starts on (rather than the current line) so that samples aggregate per function
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'.replace(';', ':')
+
+
+def collapse_stack(thread_name: str, frame: Optional[FrameType]) -> str:
+    frames = []
+    while frame is not None:
+        frames.append(format_frame(frame))
+        frame = frame.f_back
+    frames.append(thread_name.replace(';', ':'))
+    return ';'.join(reversed(frames))
+
+
+class SamplingProfiler:
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL_SECONDS) -> None:
+        self.interval = interval
+        self.thread = None
+        self.lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, seconds: float, path: str) -> bool:
+        with self.lock:
+            if self.running:
+                return False
+            self.thread = threading.Thread(target=self.profile, args=(seconds, path), name='sampling-profiler',
+                                           daemon=True)
+            self.thread.start()
+            return True
+
+    def profile(self, seconds: float, path: str) -> None:
+        print(f'Profiling all threads for {seconds}s')
+        stacks = Counter()
+        samples = 0
+        own_ident = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            # only the names are needed, and they're cheap to look up again, so don't hold on to the threads
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own_ident:
+                    stacks[collapse_stack(thread_names.get(ident, f'thread-{ident}'), frame)] += 1
+            samples += 1
+            time.sleep(self.interval)
+        # collapsed stacks, one per line, as expected by flamegraph.pl and speedscope
+        with open(path, 'w') as profile_file:
+            for stack, count in stacks.most_common():
+                profile_file.write(f'{stack} {count}\n')
+        print(f'Wrote {samples:,} samples ({len(stacks):,} distinct stacks) to {path}')
+
+
+def default_profile_path() -> str:
+    return f'jeopardy-profile-{time.strftime("%Y%m%d-%H%M%S")}.folded'
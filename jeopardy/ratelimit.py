@@ -0,0 +1,57 @@
+import time
+
+from threading import Lock
+
+
+DEFAULT_ANSWER_RATE = 2.0
+DEFAULT_CHAT_RATE = 1.0
+DEFAULT_BURST = 5
+MIN_PRUNE_THRESHOLD = 1024
+
+
+class RateLimiter:
+
+    def __init__(self, rate: float, burst: int = DEFAULT_BURST) -> None:
+        self.rate = rate
+        self.burst = burst
+        # player ID -> [tokens, last refill time]; a full bucket is the same as no bucket, so
+        # idle players get pruned and memory only grows with the number of recently active players
+        self.buckets = {}
+        self.throttled = 0
+        self.lock = Lock()
+        self.prune_threshold = MIN_PRUNE_THRESHOLD
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def acquire(self, player_id: str) -> float:
+        # returns 0 if the request is allowed, or else the number of seconds until it would be
+        if not self.enabled:
+            return 0
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(player_id)
+            if bucket is None:
+                if len(self.buckets) >= self.prune_threshold:
+                    self.prune(now)
+                bucket = self.buckets[player_id] = [self.burst, now]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0
+            self.throttled += 1
+            return (1 - bucket[0]) / self.rate
+
+    def prune(self, now: float) -> None:
+        refill_seconds = self.burst / self.rate
+        self.buckets = {
+            player_id: bucket for player_id, bucket in self.buckets.items() if now - bucket[1] < refill_seconds
+        }
+        self.prune_threshold = max(MIN_PRUNE_THRESHOLD, len(self.buckets) * 2)
+
+    def forget(self, player_id: str) -> None:
+        with self.lock:
+            self.buckets.pop(player_id, None)
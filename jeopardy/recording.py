@@ -0,0 +1,59 @@
+import dataclasses
+import json
+import threading
+import time
+
+from queue import SimpleQueue
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from jeopardy.model import Question
+
+
+LOG_VERSION = 1
+
+# (seconds since recording started, request kind, player ID, request data)
+RecordedRequest = Tuple[float, str, str, Any]
+
+
+class RequestRecorder:
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.start_time = time.monotonic()
+        # request threads only stamp and enqueue; serializing and writing happens on the writer thread
+        self.requests = SimpleQueue()
+        self.log_file = open(path, 'w')
+        self.log_file.write(json.dumps({'version': LOG_VERSION, 'started_at': time.time()}) + '\n')
+        self.thread = threading.Thread(target=self.write, name='request-recorder', daemon=True)
+        self.thread.start()
+
+    def record(self, kind: str, player_id: str, data: Any, start_time: float) -> None:
+        self.requests.put((start_time - self.start_time, kind, player_id, data))
+
+    def write(self) -> None:
+        while True:
+            recorded_request = self.requests.get()
+            if recorded_request is None:
+                break
+            offset, kind, player_id, data = recorded_request
+            self.log_file.write(json.dumps([round(offset, 6), kind, player_id, data], separators=(',', ':')) + '\n')
+        self.log_file.close()
+
+    def close(self) -> None:
+        self.requests.put(None)
+        self.thread.join()
+
+
+def question_to_json(question: Optional[Question]) -> Optional[Dict[str, Any]]:
+    # unlike Question.to_json, this keeps the answer, since the replay has to be able to grade against it
+    return dataclasses.asdict(question) if question is not None else None
+
+
+def read_log(path: str) -> Iterator[RecordedRequest]:
+    with open(path) as log_file:
+        header = json.loads(next(log_file))
+        if header.get('version') != LOG_VERSION:
+            raise ValueError(f'{path} is not a request log (or is from an incompatible version)')
+        for line in log_file:
+            if line.strip():
+                yield tuple(json.loads(line))
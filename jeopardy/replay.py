@@ -0,0 +1,125 @@
+import argparse
+import sys
+import threading
+import time
+
+from collections import defaultdict, deque
+from typing import Any, Iterator, List, Optional
+
+from flask import Flask
+
+from jeopardy.game import Game
+from jeopardy.loadtest import BotReceiver
+from jeopardy.model import Question, RegisterRequest
+from jeopardy.recording import RecordedRequest, read_log
+from jeopardy.tracing import summarize
+
+
+class ReplayGame(Game):
+
+    def __init__(self) -> None:
+        super().__init__(load_from_file=False)
+        self.queued_questions = deque()
+
+    def get_random_question(self, category: Optional[str] = None,
+                            min_value: Optional[int] = None) -> Optional[Question]:
+        # serve the questions that were actually asked, in order, so that every answer is graded the same way (and
+        # without skipping recently asked ones, which the recording already did)
+        if not self.queued_questions:
+            return None
+        return self.queued_questions.popleft()
+
+
+class Replayer:
+
+    def __init__(self, recorded_speed: bool = False) -> None:
+        self.game = ReplayGame()
+        # events still get fanned out for real, just to a sink that discards them
+        self.sink = BotReceiver('127.0.0.1', 'replay-sink')
+        self.sink_thread = threading.Thread(target=self.sink.serve_forever, daemon=True)
+        self.sink_thread.start()
+        self.app = Flask('jeopardy-replay')
+        self.recorded_speed = recorded_speed
+        self.latencies = defaultdict(list)
+        self.replayed = 0
+
+    def replay(self, recorded_requests: Iterator[RecordedRequest]) -> float:
+        start = time.monotonic()
+        for offset, kind, player_id, data in recorded_requests:
+            if self.recorded_speed:
+                delay = start + offset - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            request_start = time.perf_counter()
+            with self.app.test_request_context(headers={'X-Jeopardy-Player-ID': player_id}):
+                self.replay_request(kind, player_id, data)
+            self.latencies[kind].append(time.perf_counter() - request_start)
+            self.replayed += 1
+        # let the last notifications drain so that they're included in the timing (clearing the question first so
+        # that its timeout doesn't hold things up)
+        self.game.update_current_question(None)
+        self.game.pool.shutdown(wait=True)
+        return time.monotonic() - start
+
+    def replay_request(self, kind: str, player_id: str, data: Any) -> None:
+        game = self.game
+        if kind == 'register':
+            sink_address = f'127.0.0.1:{self.sink.port}'
+            game.register_player(RegisterRequest(player_id=player_id, address=sink_address, nick=data['nick']))
+        elif kind == 'start':
+            if not game.in_progress and data['question'] is not None:
+                game.queued_questions.append(Question(**data['question']))
+            game.start()
+        elif kind == 'question':
+            if data['question'] is not None and not game.is_current_question(data['question']['question_id']):
+                # timeouts aren't recorded, so a new question means the one before it (if any) timed out
+                game.update_current_question(None)
+                game.queued_questions.append(Question(**data['question']))
+                question = game.get_random_question(data['category'], data['min_value'])
+                game.update_current_question(question)
+        elif kind == 'answer':
+            game.check_guess(data)
+        elif kind == 'chat':
+            game.post_chat_message(data)
+        elif kind == 'nick':
+            game.change_nick(data)
+        elif kind == 'goodbye':
+            game.remove_player(player_id)
+        else:
+            raise ValueError(f'Unknown request kind: {kind}')
+
+    def report(self, elapsed: float) -> None:
+        requests_per_second = self.replayed / max(elapsed, 1e-6)
+        print(f'Replayed {self.replayed:,} requests in {elapsed:.3f}s ({requests_per_second:,.0f} requests/s)')
+        for kind, latencies in sorted(self.latencies.items()):
+            stats = summarize(latencies)
+            print(f'  {kind}: {stats["count"]:,} requests, '
+                  + ', '.join(f'{key} {stats[key] * 1000:.3f}ms' for key in ('p50', 'p90', 'p99', 'max')))
+
+    def close(self) -> None:
+        self.sink.shutdown()
+        self.sink.server_close()
+
+
+def parse_args(args: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Replay a request log recorded by jeopardyd against a fresh game')
+    parser.add_argument('log', help='The request log to replay (recorded with jeopardyd -R)')
+    parser.add_argument('-r', '--recorded-speed', action='store_true',
+                        help='Replay requests with the timing they were recorded with, rather than as fast as possible')
+    return parser.parse_args(args)
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    if args is None:
+        args = sys.argv[1:]
+    parsed_args = parse_args(args)
+    replayer = Replayer(parsed_args.recorded_speed)
+    try:
+        elapsed = replayer.replay(read_log(parsed_args.log))
+        replayer.report(elapsed)
+    finally:
+        replayer.close()
+
+
+if __name__ == '__main__':
+    main()
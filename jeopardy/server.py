@@ -1,15 +1,32 @@
 import argparse
+import hmac
+import os
+import signal
 import sys
-
-from typing import List, Optional, Union
-
-import requests
-
-from flask import Flask, request
-
-from jeopardy.game import Game, get_random_question
-from jeopardy.model import AnswerResponse, GameState, Question, RegisterRequest
-from jeopardy.utils.flask_utils import FlaskResponse, error, get_player_id, no_content, to_json
+import time
+
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from flask import Flask, Response, request
+
+from jeopardy.buzzer import DEFAULT_FAIRNESS_WINDOW_MILLIS
+from jeopardy.game import Game
+from jeopardy.grading import GradingPool
+from jeopardy.index import DEFAULT_CATEGORY_SEARCH_LIMIT, QuestionIndex
+from jeopardy.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, instrument_routes
+from jeopardy.model import AnswerResponse, Board, FinalSubmission, GameState, Question, RegisterRequest
+from jeopardy.packed import EXTENSION as PACKED_QUESTION_FILE_EXTENSION, PackedQuestionFile
+from jeopardy.presence import DEFAULT_IDLE_TIMEOUT_SECONDS, PresenceSweeper
+from jeopardy.profiler import DEFAULT_PROFILE_SECONDS, MAX_PROFILE_SECONDS, SamplingProfiler, default_profile_path
+from jeopardy.ratelimit import DEFAULT_ANSWER_RATE, DEFAULT_BURST, DEFAULT_CHAT_RATE, RateLimiter
+from jeopardy.recording import RequestRecorder, question_to_json
+from jeopardy.store import QuestionStore
+from jeopardy.upstream import UpstreamClient
+from jeopardy.utils.arg_utils import non_negative_float, positive_int
+from jeopardy.utils.flask_utils import (
+    FlaskResponse, accepted, error, get_player_id, no_content, to_json, too_many_requests
+)
 
 
 MAX_NICK_LENGTH = 12
@@ -17,8 +34,62 @@ MAX_NICK_LENGTH = 12
 
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 1024
+app.config['ADMIN_TOKEN'] = os.getenv('JEOPARDY_ADMIN_TOKEN')
 
 game = Game()
+profiler = SamplingProfiler()
+recorder = None
+rate_limiters = {
+    'answer': RateLimiter(DEFAULT_ANSWER_RATE),
+    'chat': RateLimiter(DEFAULT_CHAT_RATE),
+}
+
+
+def rate_limited(limiter_name: str) -> Callable:
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            retry_after = rate_limiters[limiter_name].acquire(get_player_id())
+            if retry_after > 0:
+                return too_many_requests(retry_after)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def recorded(kind: str) -> Callable:
+    # this goes inside to_json so that it sees the models (e.g., the question that was served) rather than JSON
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if recorder is None:
+                return view(*args, **kwargs)
+            start_time = time.monotonic()
+            result = view(*args, **kwargs)
+            # failed requests didn't change the game, so there's nothing to replay
+            if not isinstance(result, tuple) or result[1] < 400:
+                recorder.record(kind, get_player_id(), get_recorded_data(kind, result), start_time)
+            return result
+        return wrapper
+    return decorator
+
+
+def get_recorded_data(kind: str, result: Any) -> Any:
+    if kind == 'register':
+        return {'nick': request.get_json().get('nick')}
+    if kind == 'question':
+        return {
+            'category': request.args.get('category') or None,
+            'min_value': request.args.get('min_value', type=int),
+            'question': question_to_json(result) if isinstance(result, Question) else None,
+        }
+    if kind == 'start':
+        return {'question': question_to_json(game.current_question)}
+    if kind in {'answer', 'chat'}:
+        return request.get_data(as_text=True)
+    if kind == 'nick':
+        return request.get_data(as_text=True).strip()
+    return None
 
 
 @app.route('/')
@@ -28,6 +99,7 @@ def root() -> GameState:
 
 
 @app.route('/register', methods=['POST'])
+@recorded('register')
 def register() -> FlaskResponse:
     try:
         register_req = RegisterRequest.from_request(request)
@@ -45,25 +117,30 @@ def register() -> FlaskResponse:
     if len(register_req.nick) > MAX_NICK_LENGTH:
         return error(f'Maximum nickname length is {MAX_NICK_LENGTH} characters', status=400)
 
-    # ping the client to make sure it's up
-    resp = requests.get(f'http://{register_req.address}/id')
-    if resp.ok and resp.text == register_req.player_id:
-        game.register_player(register_req)
-        print(f'Added player {register_req.player_id} ({register_req.address})')
-        return no_content()
-    print(f'Failed to add player {register_req.player_id} ({register_req.address})')
-    return error('Failed to connect to client')
+    # the client is pinged in the background; it can poll GET /register to find out when it's been verified
+    game.request_registration(register_req)
+    return accepted()
+
+
+@app.route('/register')
+@to_json
+def registration_status() -> Dict[str, Any]:
+    return {'status': game.get_registration_status(get_player_id())}
 
 
 @app.route('/goodbye', methods=['POST'])
+@recorded('goodbye')
 def goodbye() -> FlaskResponse:
     player_id = get_player_id()
     game.remove_player(player_id)
+    for limiter in rate_limiters.values():
+        limiter.forget(player_id)
     print(f'Removed player {player_id}')
     return no_content()
 
 
 @app.route('/start', methods=['POST'])
+@recorded('start')
 def start_game() -> FlaskResponse:
     try:
         game.start()
@@ -74,34 +151,127 @@ def start_game() -> FlaskResponse:
 
 @app.route('/question')
 @to_json
+@recorded('question')
 def get_question() -> Union[Optional[Question], FlaskResponse]:
     with game.lock:
         if game.current_question is not None:
             return game.current_question
-    question = get_random_question()
+        if game.final_round is not None:
+            return error('The final round is in progress', status=400)
+    category = request.args.get('category') or None
+    min_value = request.args.get('min_value', type=int)
+    if min_value is None and request.args.get('min_value'):
+        return error('min_value must be an integer', status=400)
+    try:
+        question = game.get_random_question(category, min_value)
+    except ValueError as e:
+        return error(str(e), status=400)
     if question is None:
-        return error('Failed to fetch question from TrivialBuzz API')
+        if category is not None or min_value is not None:
+            return error('No questions match the requested filters', status=404)
+        return error('Failed to fetch question')
     game.update_current_question(question)
     return game.current_question
 
 
+@app.route('/board')
+@to_json
+def get_board() -> Union[Board, FlaskResponse]:
+    if game.question_index is None:
+        return error('Board mode requires a question store', status=400)
+    board = game.get_board()
+    if board is None:
+        return error('Not enough categories in the question store to build a board')
+    return board
+
+
+@app.route('/board/<cell_id>', methods=['POST'])
+@to_json
+def select_board_cell(cell_id: str) -> Union[Question, FlaskResponse]:
+    try:
+        return game.select_board_cell(cell_id)
+    except ValueError as e:
+        return error(str(e), status=400)
+
+
+@app.route('/categories')
+@to_json
+def get_categories() -> Union[Dict[str, Any], FlaskResponse]:
+    if game.question_index is None:
+        return error('Searching categories requires a question store', status=400)
+    prefix = request.args.get('prefix', '')
+    limit = request.args.get('limit', type=int)
+    if limit is None and request.args.get('limit'):
+        return error('limit must be an integer', status=400)
+    if limit is None:
+        limit = DEFAULT_CATEGORY_SEARCH_LIMIT
+    elif limit < 0:
+        return error('limit must not be negative', status=400)
+    return {'categories': game.question_index.search_categories(prefix, limit)}
+
+
 @app.route('/answer', methods=['POST'])
+@rate_limited('answer')
 @to_json
+@recorded('answer')
 def submit_answer() -> Union[AnswerResponse, FlaskResponse]:
     if game.current_question is None:
         return error('There is no current question', status=400)
-
-    correct, close, value = game.check_guess(request.get_data(as_text=True))
+    try:
+        correct, close, value = game.check_guess(request.get_data(as_text=True))
+    except ValueError as e:
+        return error(str(e), status=409)
     return AnswerResponse(is_correct=correct, is_close=close, value=value)
 
 
+@app.route('/buzz', methods=['POST'])
+def buzz() -> FlaskResponse:
+    # stamp the buzz before doing anything else so that request handling doesn't skew the arbitration
+    timestamp = time.monotonic_ns()
+    if not game.buzz_in_mode:
+        return error('Buzz-in mode is not enabled', status=400)
+    game.buzz(timestamp, get_player_id())
+    return accepted()
+
+
+@app.route('/final', methods=['POST'])
+@to_json
+def start_final_round() -> Union[Question, FlaskResponse]:
+    try:
+        return game.start_final_round()
+    except ValueError as e:
+        return error(str(e), status=400)
+    except RuntimeError as e:
+        return error(str(e))
+
+
+@app.route('/final/answer', methods=['POST'])
+def submit_final_answer() -> FlaskResponse:
+    try:
+        submission = FinalSubmission.from_request(request)
+    except (TypeError, ValueError) as e:
+        return error(f'Failed to parse final answer: {e}', status=400)
+    # bools are ints too, but a wager of "true" is a mistake
+    if not isinstance(submission.wager, int) or isinstance(submission.wager, bool) \
+            or not isinstance(submission.answer, str):
+        return error('Final answer must include an integer wager and an answer', status=400)
+    try:
+        game.submit_final_answer(submission)
+    except ValueError as e:
+        return error(str(e), status=400)
+    return accepted()
+
+
 @app.route('/chat', methods=['POST'])
+@rate_limited('chat')
+@recorded('chat')
 def chat() -> FlaskResponse:
     game.post_chat_message(request.get_data(as_text=True))
     return no_content()
 
 
 @app.route('/nick', methods=['POST'])
+@recorded('nick')
 def change_nick() -> FlaskResponse:
     player_id = get_player_id()
     if player_id not in game.players or not game.players[player_id].is_active:
@@ -118,19 +288,79 @@ def change_nick() -> FlaskResponse:
     return no_content()
 
 
+@app.route('/admin/profile', methods=['POST'])
+def start_profile() -> FlaskResponse:
+    admin_token = app.config['ADMIN_TOKEN']
+    if not admin_token:
+        return error('Admin endpoints are disabled', status=404)
+    if not hmac.compare_digest(request.headers.get('X-Jeopardy-Admin-Token', ''), admin_token):
+        return error('Invalid admin token', status=403)
+    seconds = request.args.get('seconds', DEFAULT_PROFILE_SECONDS, type=float)
+    if not 0 < seconds <= MAX_PROFILE_SECONDS:
+        return error(f'Profiling time must be between 0 and {MAX_PROFILE_SECONDS} seconds', status=400)
+    if not profiler.start(seconds, default_profile_path()):
+        return error('A profile is already running', status=409)
+    return accepted()
+
+
+@app.route('/metrics')
+def metrics() -> Response:
+    return Response(game.metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+
 def is_invalid_nick(nick: str, player_id: str) -> bool:
     return any(
         player.nick == nick and player.player_id != player_id
-        for player in game.players.values()
+        for player in [*game.players.values(), *game.pending_registrations.values()]
     )
 
 
+# this has to come after every route has been defined
+request_latency = game.metrics.histogram(
+    'jeopardy_request_duration_seconds', 'Time spent handling each request, by endpoint', ['endpoint']
+)
+instrument_routes(app, request_latency)
+for limiter_name in rate_limiters:
+    game.metrics.callback_counter(
+        f'jeopardy_{limiter_name}_throttled_total', f'Requests to /{limiter_name} rejected by the rate limiter',
+        lambda limiter_name=limiter_name: rate_limiters[limiter_name].throttled
+    )
+
+
+def handle_profile_signal(signum: int, frame: Any) -> None:
+    if not profiler.start(DEFAULT_PROFILE_SECONDS, default_profile_path()):
+        print('A profile is already running')
+
+
 def parse_args(args: List[str]) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description='Run a "Jeopardy!" server for players to connect to')
     parser.add_argument('-s', '--server_address', default='0.0.0.0',
                         help='The IP address on which to run the server')
     parser.add_argument('-p', '--port', type=int, default=8008,
                         help='The port on which to run the server')
+    parser.add_argument('-d', '--question-store',
+                        help='A question store (created with jeopardy-import) or packed question file '
+                             '(created with jeopardy-pack) to sample questions from instead of the TrivialBuzz API')
+    parser.add_argument('-g', '--grading-workers', type=int, default=0,
+                        help='The number of worker processes to use for grading answers (0 to grade in-process)')
+    parser.add_argument('-q', '--question-source', dest='question_source_url',
+                        help='The URL of the TrivialBuzz-compatible API to fetch random questions from')
+    parser.add_argument('-i', '--idle-timeout', type=int, default=DEFAULT_IDLE_TIMEOUT_SECONDS,
+                        help='The number of seconds after which idle, unreachable players are removed (0 to disable)')
+    parser.add_argument('-b', '--buzz-in', action='store_true',
+                        help='Require players to buzz in before answering')
+    parser.add_argument('-w', '--buzz-window', type=int, default=DEFAULT_FAIRNESS_WINDOW_MILLIS,
+                        help='The window (in milliseconds) within which simultaneous buzzes are considered together')
+    parser.add_argument('-a', '--answer-rate', type=non_negative_float, default=DEFAULT_ANSWER_RATE,
+                        help='The number of answers per second each player may submit (0 for no limit)')
+    parser.add_argument('-c', '--chat-rate', type=non_negative_float, default=DEFAULT_CHAT_RATE,
+                        help='The number of chat messages per second each player may send (0 for no limit)')
+    parser.add_argument('-r', '--rate-burst', type=positive_int, default=DEFAULT_BURST,
+                        help='The number of answers or chat messages a player may send at once before being limited')
+    parser.add_argument('-t', '--admin-token',
+                        help='A secret that enables admin endpoints (e.g., /admin/profile) for requests that send it')
+    parser.add_argument('-R', '--record',
+                        help='A file to record incoming requests to, for replaying later with jeopardy-replay')
     return parser.parse_args(args)
 
 
@@ -138,11 +368,43 @@ def main(args: Optional[List[str]] = None) -> None:
     if args is None:
         args = sys.argv[1:]
     parsed_args = parse_args(args)
+    global recorder
+    if parsed_args.record:
+        recorder = RequestRecorder(parsed_args.record)
+    if parsed_args.admin_token:
+        app.config['ADMIN_TOKEN'] = parsed_args.admin_token
+    if hasattr(signal, 'SIGUSR1'):
+        # "kill -USR1 <pid>" profiles the server without needing an admin token
+        signal.signal(signal.SIGUSR1, handle_profile_signal)
+    if parsed_args.question_source_url:
+        game.upstream = UpstreamClient(parsed_args.question_source_url)
+    if parsed_args.question_store:
+        if parsed_args.question_store.endswith(PACKED_QUESTION_FILE_EXTENSION):
+            game.question_store = PackedQuestionFile(parsed_args.question_store)
+        else:
+            game.question_store = QuestionStore(parsed_args.question_store)
+        game.question_index = QuestionIndex(game.question_store)
+        print(f'Indexed {len(game.question_index):,} questions')
+    rate_limiters['answer'] = RateLimiter(parsed_args.answer_rate, parsed_args.rate_burst)
+    rate_limiters['chat'] = RateLimiter(parsed_args.chat_rate, parsed_args.rate_burst)
+    if parsed_args.grading_workers > 0:
+        game.grading_pool = GradingPool(parsed_args.grading_workers)
+    if parsed_args.buzz_in:
+        game.enable_buzz_in(parsed_args.buzz_window)
+    if parsed_args.idle_timeout > 0:
+        game.presence = PresenceSweeper(game, parsed_args.idle_timeout)
+        game.presence.start()
     try:
         app.run(host=parsed_args.server_address, port=parsed_args.port)
     finally:
         print('\nSaving game file')
         game.save_game_file()
+        if game.grading_pool is not None:
+            game.grading_pool.shutdown()
+        if game.presence is not None:
+            game.presence.stop()
+        if recorder is not None:
+            recorder.close()
 
 
 if __name__ == '__main__':
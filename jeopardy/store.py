@@ -0,0 +1,113 @@
+import random
+import sqlite3
+import threading
+import uuid
+
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from jeopardy.model import Question
+
+
+QuestionRow = Tuple[Optional[str], str, str, str, str, int, str]
+
+
+class QuestionStore:
+
+    DEFAULT_FILEPATH = 'jeopardy_questions.db'
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS questions (
+            id INTEGER PRIMARY KEY,
+            source_id TEXT UNIQUE,
+            text TEXT NOT NULL,
+            answer TEXT NOT NULL,
+            answer_key TEXT NOT NULL,
+            category TEXT NOT NULL,
+            value INTEGER NOT NULL,
+            fingerprint TEXT NOT NULL UNIQUE
+        )
+    '''
+
+    COLUMNS = 'id, source_id, text, answer, answer_key, category, value'
+
+    def __init__(self, path: str = DEFAULT_FILEPATH) -> None:
+        self.path = path
+        self.local = threading.local()
+        with self.connection as conn:
+            conn.execute(self.SCHEMA)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads, so each request thread gets its own
+        conn = getattr(self.local, 'connection', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self.local.connection = conn
+        return conn
+
+    def count(self) -> int:
+        return self.connection.execute('SELECT count(*) FROM questions').fetchone()[0]
+
+    def insert_many(self, rows: Iterable[QuestionRow]) -> int:
+        conn = self.connection
+        with conn:
+            before = conn.total_changes
+            # duplicates (by source ID or by content) are silently skipped
+            conn.executemany(
+                'INSERT OR IGNORE INTO questions '
+                '(source_id, text, answer, answer_key, category, value, fingerprint) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            return conn.total_changes - before
+
+    def iter_rows(self) -> Iterator[QuestionRow]:
+        yield from self.connection.execute(
+            'SELECT source_id, text, answer, answer_key, category, value, fingerprint FROM questions ORDER BY id'
+        )
+
+    def iter_categories(self) -> Iterator[Tuple[int, str, int]]:
+        yield from self.connection.execute('SELECT id, category, value FROM questions')
+
+    def get_question(self, row_id: int) -> Optional[Question]:
+        row = self.connection.execute(f'SELECT {self.COLUMNS} FROM questions WHERE id = ?', (row_id,)).fetchone()
+        return self.to_question(row)
+
+    def get_questions(self, row_ids: List[int]) -> List[Question]:
+        # fetch every question in a single query, then put them back in the order they were asked for
+        placeholders = ', '.join('?' * len(row_ids))
+        rows = self.connection.execute(f'SELECT {self.COLUMNS} FROM questions WHERE id IN ({placeholders})', row_ids)
+        questions = {row[0]: self.to_question(row) for row in rows}
+        return [questions[row_id] for row_id in row_ids if row_id in questions]
+
+    def get_random_question(self) -> Optional[Question]:
+        max_id = self.connection.execute('SELECT max(id) FROM questions').fetchone()[0]
+        if max_id is None:
+            return None
+        row = self.connection.execute(
+            f'SELECT {self.COLUMNS} FROM questions WHERE id >= ? ORDER BY id LIMIT 1',
+            (random.randint(1, max_id),)
+        ).fetchone()
+        return self.to_question(row)
+
+    @staticmethod
+    def to_question(row: Optional[tuple]) -> Optional[Question]:
+        if row is None:
+            return None
+        row_id, source_id, text, answer, answer_key, category, value = row
+        return Question(
+            question_id=str(uuid.uuid4()),
+            text=text,
+            answer=answer,
+            category=category,
+            value=value,
+            source_id=source_id or str(row_id),
+            answer_key=answer_key
+        )
+
+    def close(self) -> None:
+        conn = getattr(self.local, 'connection', None)
+        if conn is not None:
+            conn.close()
+            self.local.connection = None
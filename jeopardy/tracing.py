@@ -0,0 +1,72 @@
+import json
+import time
+
+from collections import deque
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+
+DEFAULT_MAX_SAMPLES = 10000
+PERCENTILES = (50, 90, 99)
+
+# (stage, start timestamp, end timestamp); "created" and "sent" come from the server's clock and "received"
+# and "displayed" from the client's, so the network stage also absorbs any clock skew between the two
+STAGES = (
+    ('server', 'created', 'sent'),
+    ('network', 'sent', 'received'),
+    ('client', 'received', 'displayed'),
+    ('total', 'created', 'displayed'),
+)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(values: List[float]) -> Dict[str, Any]:
+    sorted_values = sorted(values)
+    summary = {'count': len(sorted_values)}
+    for pct in PERCENTILES:
+        summary[f'p{pct}'] = percentile(sorted_values, pct)
+    summary['max'] = sorted_values[-1] if sorted_values else 0.0
+    return summary
+
+
+class EventTracer:
+
+    def __init__(self, path: Optional[str] = None, max_samples: int = DEFAULT_MAX_SAMPLES) -> None:
+        self.path = path
+        # only the most recent samples are kept, so a long game can't grow this without bound
+        self.samples = {stage: deque(maxlen=max_samples) for stage, _, _ in STAGES}
+        self.traced = 0
+        self.lock = Lock()
+
+    def record(self, timestamps: Dict[str, float], displayed: Optional[float] = None) -> None:
+        if displayed is not None:
+            timestamps = dict(timestamps, displayed=displayed)
+        with self.lock:
+            self.traced += 1
+            for stage, start, end in STAGES:
+                if start in timestamps and end in timestamps:
+                    self.samples[stage].append(timestamps[end] - timestamps[start])
+
+    def summarize(self) -> Dict[str, Dict[str, Any]]:
+        with self.lock:
+            samples = {stage: list(values) for stage, values in self.samples.items()}
+        return {stage: summarize(values) for stage, values in samples.items() if values}
+
+    def export(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        if path is None:
+            return
+        trace = {
+            'exported_at': time.time(),
+            'events_traced': self.traced,
+            'stages': self.summarize(),
+        }
+        with open(path, 'w') as trace_file:
+            json.dump(trace, trace_file, sort_keys=True, indent=4)
+        print(f'Wrote event trace to {path}')
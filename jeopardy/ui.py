@@ -1,22 +1,29 @@
 import datetime
+import os
 import random
 import re
+import threading
+import time
 import tkinter as tk
 import uuid
 
-from collections import namedtuple
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor as Pool
 from tkinter import font
 from tkinter import ttk
-from multiprocessing import Process, Queue
+from multiprocessing import Process
+from queue import SimpleQueue
 from threading import RLock
-from typing import Iterable, Optional, Union
+from typing import Any, Callable, Iterable, List, Optional, Tuple, Union
 
 import requests
 
+from jeopardy.channel import EventChannel
 from jeopardy.cli import ClientApp
 from jeopardy.client import JeopardyClient
 from jeopardy.game import QUESTION_TIMEOUT_SECONDS
-from jeopardy.model import Event, GameInfo, NickUpdate, PlayerInfo, Question
+from jeopardy.model import AnswerResponse, Board, Event, GameInfo, GameState, NickUpdate, PlayerInfo, Question
+from jeopardy.tracing import EventTracer
 
 
 SUPPRESS_FLASK_LOGGING = True
@@ -29,6 +36,11 @@ TaggedText = namedtuple('TaggedText', ['text', 'tags'])
 class JeopardyApp(ttk.Frame):
 
     DEFAULT_TICK_DELAY_MILLIS = 100
+    STATUS_UPDATE_DELAY_MILLIS = 1000
+    MAX_MESSAGES_PER_TICK = 500
+    BACKLOG_TICK_DELAY_MILLIS = 1
+    DEFAULT_SCROLLBACK_EVENTS = 1000
+    STATS_FIRST_LINE = 3
     FONT_FAMILY = 'Consolas'  # was Courier
     HOST = 'Host'
 
@@ -62,12 +74,17 @@ class JeopardyApp(ttk.Frame):
         'To send a chat message, enter "/c" followed by your message. '
         'To change your nickname, enter "/n " followed by the new nickname. '
         'To see detailed statistics, enter "/s". '
+        'To buzz in (if the server requires it), enter "/b". '
+        'To see the game board, enter "/board"; to pick a clue from it, enter "/p" followed by the clue\'s code. '
+        'To start a final round, enter "/final"; to answer it, enter "/w" followed by your wager and your answer. '
         'To answer a question, simply enter your answer in the text box.\n'
     )
 
     def __init__(self, master: Optional[tk.Tk] = None, server_address: Optional[str] = None,
                  client_ip: Optional[str] = None, client_port: Optional[int] = None,
-                 player_id: Optional[str] = None, nick: Optional[str] = None, dark_mode: bool = False) -> None:
+                 player_id: Optional[str] = None, nick: Optional[str] = None, dark_mode: bool = False,
+                 trace_file: Optional[str] = None, scrollback: Optional[int] = None,
+                 archive_file: Optional[str] = None) -> None:
         if master is None:
             master = tk.Tk()
             master.minsize(width=400, height=300)
@@ -83,14 +100,39 @@ class JeopardyApp(ttk.Frame):
         self.client = JeopardyClient(self.server_address, self.player_id)
         self.players = {}
         self.stats = GameInfo()
+        # the (text, tags) of each player line currently in the stats pane, or None before the heading is drawn
+        self.stats_lines = None
+        self.stats_dirty = False
         self.current_question_id = None
         self.question_timeout = None
         self.lock = RLock()
 
         self.app_process = None
-        self.event_queue = Queue(maxsize=100)
-        self.stats_queue = Queue(maxsize=100)
-        self.question_queue = Queue(maxsize=1)
+        self.gui_pid = os.getpid()
+        # events, stats updates, and questions from the client app process (see deliver)
+        self.channel = EventChannel()
+        self.local_messages = SimpleQueue()
+        # results of network calls made in the background, to be applied on the Tk thread
+        self.callback_queue = SimpleQueue()
+        self.request_pool = Pool(4)
+        # every item put on one of the local queues above is followed by a byte on this pipe, which wakes up the
+        # Tk loop (the channel's own pipe wakes it up for messages from the client app)
+        self.wakeup_reader, self.wakeup_writer = os.pipe()
+        os.set_blocking(self.wakeup_writer, False)
+        self.wakeup_handler_registered = False
+        self.backlog_tick_pending = False
+        self.poll_tick_pending = False
+        self.status_update_job = None
+        self.tracer = EventTracer(trace_file) if trace_file else None
+        # the number of lines each event in the event pane takes up, oldest first
+        self.event_line_counts = deque()
+        self.scrollback = self.DEFAULT_SCROLLBACK_EVENTS if scrollback is None else scrollback
+        # trim a tenth of the scrollback at a time, so that trimming doesn't happen on every insert
+        self.scrollback_trim_chunk = max(self.scrollback // 10, 1)
+        self.archive_file = archive_file
+        self.archive = None
+        # the timestamps of the event being handled on each of the client app's request threads
+        self.event_context = threading.local()
 
         # enable resizing
         top = self.winfo_toplevel()
@@ -237,19 +279,10 @@ class JeopardyApp(ttk.Frame):
         longest_nick_player = max(self.players.values(), key=lambda p: len(p.nick))
         return len(longest_nick_player.nick)
 
-    def fetch_stats(self) -> None:
-        game = self.client.get_game_state()
-        if game is not None:
-            self.stats = game.statistics
-            self.players = game.players
-
-    def update_stats(self) -> None:
+    def get_stats_lines(self) -> List[Tuple[str, Tuple[str, ...]]]:
         def get_stats(player: PlayerInfo, alignment: int) -> str:
             return f'{player.nick:{len(player.nick) + alignment}}{self.format_score(player.score)}\n'
 
-        if not self.players:
-            return
-
         stats = {
             player_id: f'{player.nick}{self.format_score(player.score)}'
             for player_id, player in self.players.items()
@@ -260,23 +293,43 @@ class JeopardyApp(ttk.Frame):
         inactive_players = [player for player in self.players.values() if not player.is_active]
         sorted_active_players = sorted(active_players, key=lambda p: p.score, reverse=True)
         sorted_inactive_players = sorted(inactive_players, key=lambda p: p.score, reverse=True)
-        self.stats_pane.configure(state=tk.NORMAL)
-        self.stats_pane.delete('1.0', tk.END)
-        self.stats_pane.insert('1.0', 'Players\n', ('players_heading',))
-        self.stats_pane.insert(tk.END, '\n')
 
+        lines = []
         for player in sorted_active_players:
             align = (longest_stats_len - len(stats[player.player_id])) + 2
-            player_stats = get_stats(player, align)
-            if player.player_id == self.player_id:
-                self.stats_pane.insert(tk.END, player_stats, ('bold', 'centered'))
-            else:
-                self.stats_pane.insert(tk.END, player_stats, ('centered',))
-
+            tags = ('bold', 'centered') if player.player_id == self.player_id else ('centered',)
+            lines.append((get_stats(player, align), tags))
         for player in sorted_inactive_players:
             align = (longest_stats_len - len(stats[player.player_id])) + 2
-            self.stats_pane.insert(tk.END, get_stats(player, align), ('players_inactive', 'centered'))
+            lines.append((get_stats(player, align), ('players_inactive', 'centered')))
+        return lines
+
+    def update_stats(self) -> None:
+        # called at most once per tick, and only when something that's shown in the pane may have changed
+        self.stats_dirty = False
+        if not self.players:
+            return
 
+        lines = self.get_stats_lines()
+        self.stats_pane.configure(state=tk.NORMAL)
+        if self.stats_lines is None:
+            self.stats_pane.insert('1.0', 'Players\n', ('players_heading',))
+            self.stats_pane.insert(tk.END, '\n')
+            self.stats_lines = []
+
+        # only rewrite the lines that actually changed (players are listed starting on the third line)
+        for index, line in enumerate(lines):
+            if index < len(self.stats_lines) and self.stats_lines[index] == line:
+                continue
+            line_number = index + self.STATS_FIRST_LINE
+            if index < len(self.stats_lines):
+                self.stats_pane.delete(f'{line_number}.0', f'{line_number + 1}.0')
+            text, tags = line
+            self.stats_pane.insert(f'{line_number}.0', text, tags)
+        if len(lines) < len(self.stats_lines):
+            self.stats_pane.delete(f'{len(lines) + self.STATS_FIRST_LINE}.0', tk.END)
+
+        self.stats_lines = lines
         self.stats_pane.configure(state=tk.DISABLED)
 
     def register(self) -> None:
@@ -292,13 +345,25 @@ class JeopardyApp(ttk.Frame):
         self.client.register(f'{client_address}:{self.client_port}', self.nick)
 
     def show_event(self, event_parts: Iterable[Union[str, TaggedText]]) -> None:
-        self.event_queue.put_nowait(event_parts)
+        # only the first line shown for an event is traced, since that's when the player first sees it
+        timestamps = getattr(self.event_context, 'timestamps', None)
+        self.event_context.timestamps = None
+        self.deliver('event', (event_parts, timestamps))
 
     def show_stats_update(self, event: Event) -> None:
-        self.stats_queue.put_nowait(event)
+        self.deliver('stats', event)
+
+    def deliver(self, kind: str, payload: Any) -> None:
+        if os.getpid() == self.gui_pid:
+            # the channel only carries messages from the client app process
+            self.local_messages.put((kind, payload))
+            self.wake()
+        else:
+            self.channel.send((kind, payload))
 
     def append_to_event_pane(self, event_parts: Iterable[Union[str, TaggedText]]) -> None:
         self.event_pane.configure(state=tk.NORMAL)
+        start_line = self.get_event_pane_line_count()
         for event_part in event_parts:
             if isinstance(event_part, TaggedText):
                 text, tags = event_part
@@ -309,9 +374,25 @@ class JeopardyApp(ttk.Frame):
                 self.event_pane.insert(tk.END, event_part)
         self.event_pane.insert(tk.END, '\n')
         self.event_pane.insert(tk.END, '\n', ('small',))
+        self.event_line_counts.append(self.get_event_pane_line_count() - start_line)
+        if len(self.event_line_counts) >= self.scrollback + self.scrollback_trim_chunk:
+            self.trim_event_pane()
         self.event_pane.configure(state=tk.DISABLED)
         self.event_pane.see(tk.END)
 
+    def get_event_pane_line_count(self) -> int:
+        return int(self.event_pane.index('end-1c').split('.')[0])
+
+    def trim_event_pane(self) -> None:
+        lines = sum(self.event_line_counts.popleft() for _ in range(self.scrollback_trim_chunk))
+        end = f'{lines + 1}.0'
+        if self.archive_file is not None:
+            if self.archive is None:
+                self.archive = open(self.archive_file, 'a')
+            self.archive.write(self.event_pane.get('1.0', end))
+            self.archive.flush()
+        self.event_pane.delete('1.0', end)
+
     def player_says(self, player: str, message_parts: Union[str, Iterable[Union[str, TaggedText]]]) -> None:
         if isinstance(message_parts, str):
             message_parts = [message_parts]
@@ -337,6 +418,36 @@ class JeopardyApp(ttk.Frame):
             TaggedText('\n', 'line'),
         ])
 
+    def show_board(self, board: Board) -> None:
+        board_parts = [
+            '\n',
+            TaggedText('\n', 'line'),
+        ]
+        for category in board.categories:
+            cells = [cell for cell in board.cells if cell.category == category]
+            board_parts.append(TaggedText(category.upper() + '\n', 'question_category'))
+            cell_texts = [
+                f'{cell.cell_id}: {self.format_score(cell.value)}' if cell.is_available else f'{cell.cell_id}: ----'
+                for cell in cells
+            ]
+            board_parts.append(TaggedText('    '.join(cell_texts) + '\n', 'centered'))
+        board_parts.append(TaggedText('\n', 'line'))
+        self.show_event(board_parts)
+
+    def show_final_round(self, question: Question) -> None:
+        self.host_says('It\'s time for the final round! Enter "/w" followed by your wager and your answer.')
+        self.show_question(question)
+
+    def show_final_results(self, event: Event) -> None:
+        self.host_says(f'The correct answer is: {event.payload["answer"]}')
+        for result in event.payload['results']:
+            nick = result['player']['nick']
+            outcome = 'correct' if result['is_correct'] else 'incorrect'
+            self.player_says(nick, [
+                f'What is {result["answer"]}? ',
+                TaggedText(f'({outcome}, wagered {self.format_score(result["wager"])})', 'bold'),
+            ])
+
     def show_detailed_stats(self) -> None:
         def format_ratio(numerator: int, denominator: int) -> str:
             ratio = 0.0 if denominator == 0 else (numerator / denominator) * 100
@@ -373,31 +484,69 @@ class JeopardyApp(ttk.Frame):
         ])
         self.show_event(stats)
 
+    def in_background(self, call: Callable[[], Any], callback: Callable[[Any], None]) -> None:
+        # network calls run off the Tk thread; their results come back through the callback queue (see tick)
+        def run() -> None:
+            try:
+                result = call()
+            except (requests.RequestException, RuntimeError) as e:
+                print(f'Failed to reach server: {e}')
+                result = None
+            except Exception as e:
+                # anything else (a malformed response, say) must still reach the callback, or the UI waits forever
+                print(f'Failed to handle server response: {e!r}')
+                result = None
+            self.callback_queue.put((callback, result))
+            self.wake()
+
+        self.request_pool.submit(run)
+
     def handle_user_input(self, event: tk.Event) -> None:
         user_input = self.input_text.get().strip()
+        self.input_text.set('')
         if not user_input:
             user_input = '/q'
         if user_input == '/h':
             # TODO improve this help text
             self.show_event(['Type "/q" to get a new question. Enter your answer to check if it is correct.'])
         elif user_input == '/q':
-            question = self.client.get_question()
-            self.maybe_update_and_show_question(question)
+            self.in_background(self.client.get_question, self.on_question)
         elif user_input == '/s':
             self.show_detailed_stats()
+        elif user_input == '/board':
+            self.in_background(self.client.get_board, self.on_board)
+        elif user_input.startswith('/p '):
+            cell_id = user_input[3:].strip()
+            self.in_background(lambda: self.client.select_board_cell(cell_id), self.on_board_cell)
+        elif user_input == '/final':
+            self.in_background(self.client.start_final_round, self.on_final_round)
+        elif user_input.startswith('/w '):
+            wager, _, answer = user_input[3:].strip().partition(' ')
+            try:
+                wager = int(wager.replace('$', '').replace(',', ''))
+            except ValueError:
+                self.host_says(f'{self.nick}, please enter your wager followed by your answer.')
+            else:
+                self.in_background(lambda: self.client.submit_final_answer(wager, answer.strip()),
+                                   self.on_final_answer)
+        elif user_input == '/b':
+            if self.current_question_id is None:
+                self.host_says(f'{self.nick}, there is currently no active question.')
+            else:
+                self.in_background(self.client.buzz, lambda ok: None)
         elif user_input.startswith('/c '):
             message = user_input[3:]
-            self.client.chat(message)
+            # show the message right away, and only say something if it turns out it couldn't be sent
             self.player_says(self.nick, message)
+            self.in_background(lambda: self.client.chat(message), self.on_chat)
         elif user_input.startswith('/n '):
             new_nick = user_input[3:]
             if new_nick != self.nick:
-                if self.client.change_nick(new_nick):
-                    self.nick = new_nick
-                    self.players[self.player_id].nick = new_nick
-                    self.host_says(f'You are now known as {new_nick}.')
-                else:
-                    self.host_says(f"Sorry, {self.nick}, I wasn't able to do that.")
+                old_nick = self.nick
+                self.set_nick(new_nick)
+                self.host_says(f'You are now known as {new_nick}.')
+                self.in_background(lambda: self.client.change_nick(new_nick),
+                                   lambda ok: self.on_nick_change(ok, old_nick, new_nick))
         else:
             if self.current_question_id is None:
                 self.host_says(f'{self.nick}, there is currently no active question.')
@@ -406,35 +555,90 @@ class JeopardyApp(ttk.Frame):
                 player.total_answers += 1
                 self.stats.total_answers += 1
                 self.player_says(self.nick, f'What is {user_input}?')
-                resp = self.client.answer(user_input)
-                if resp is not None and resp.is_correct:
-                    host_response = f'{self.nick}, that is correct.'
-                    player.correct_answers += 1
-                    player.score += resp.value
-                    self.stats.total_correct_answers += 1
-                    self.stats.questions_answered += 1
-                    self.update_current_question(None)
-                elif resp is not None and resp.is_close:
-                    host_response = f'{self.nick}, can you be more specific?'
-                else:
-                    host_response = f'No, sorry, {self.nick}.'
-                self.host_says(host_response)
-        self.input_text.set('')
+                self.in_background(lambda: self.client.answer(user_input), self.on_answer)
+
+    def on_question(self, question: Optional[Question]) -> None:
+        if question is None:
+            self.host_says(f"Sorry, {self.nick}, I couldn't find a question.")
+        else:
+            self.maybe_update_and_show_question(question)
+
+    def on_board(self, board: Optional[Board]) -> None:
+        if board is None:
+            self.host_says(f"Sorry, {self.nick}, there's no board to show.")
+        else:
+            self.show_board(board)
+
+    def on_board_cell(self, question: Optional[Question]) -> None:
+        if question is None:
+            self.host_says(f"Sorry, {self.nick}, you can't pick that clue right now.")
+        else:
+            self.maybe_update_and_show_question(question)
+
+    def on_final_round(self, question: Optional[Question]) -> None:
+        if question is None:
+            self.host_says(f"Sorry, {self.nick}, you can't start a final round right now.")
+        else:
+            self.show_final_round(question)
+
+    def on_final_answer(self, ok: Optional[bool]) -> None:
+        if ok:
+            self.host_says(f'Thank you, {self.nick}. Your answer is locked in.')
+        else:
+            self.host_says(f"Sorry, {self.nick}, I wasn't able to accept that.")
+
+    def on_chat(self, ok: Optional[bool]) -> None:
+        if not ok:
+            self.host_says(f"Sorry, {self.nick}, your last message couldn't be delivered.")
+
+    def set_nick(self, nick: str) -> None:
+        self.nick = nick
+        if self.player_id in self.players:
+            self.players[self.player_id].nick = nick
+            self.stats_dirty = True
+
+    def on_nick_change(self, ok: Optional[bool], old_nick: str, new_nick: str) -> None:
+        if not ok:
+            # the nick was changed optimistically, so put it back
+            if self.nick == new_nick:
+                self.set_nick(old_nick)
+            self.host_says(f"Sorry, {old_nick}, I wasn't able to do that.")
+
+    def on_answer(self, resp: Optional[AnswerResponse]) -> None:
+        if resp is not None and resp.is_correct:
+            host_response = f'{self.nick}, that is correct.'
+            player = self.players[self.player_id]
+            player.correct_answers += 1
+            player.score += resp.value
+            self.stats_dirty = True
+            self.stats.total_correct_answers += 1
+            self.stats.questions_answered += 1
+            self.update_current_question(None)
+        elif resp is not None and resp.is_close:
+            host_response = f'{self.nick}, can you be more specific?'
+        else:
+            host_response = f'No, sorry, {self.nick}.'
+        self.host_says(host_response)
 
     def handle(self, event: Event) -> None:
+        self.event_context.timestamps = event.timestamps
+        if event.event_type in {'BUZZ_GRANTED', 'ANSWER_SLOT_EXPIRED'}:
+            self.handle_buzz_event(event)
+            return
         if event.player is not None and event.player.player_id == self.player_id:
             return  # don't respond to our own events
         if event.event_type == 'NEW_GAME':
             self.host_says('A new game is starting!')
         elif event.event_type == 'NEW_QUESTION':
-            question = Question.from_json(event.payload)
-            self.question_queue.put_nowait(question)
+            # the question is shown on the Tk thread, so its timestamps go with it (see apply_message)
+            self.deliver('question', (Question.from_json(event.payload), event.timestamps))
+            self.event_context.timestamps = None
         elif event.event_type == 'NEW_ANSWER':
             nick = event.player.nick
             answer = event.payload['answer']
             if event.payload['is_correct']:
                 host_response = f'{nick}, that is correct.'
-                self.question_queue.put_nowait(None)
+                self.deliver('question', (None, None))
             elif event.payload['is_close']:
                 host_response = f'{nick}, can you be more specific?'
             else:
@@ -442,17 +646,30 @@ class JeopardyApp(ttk.Frame):
             self.player_says(nick, f'What is {answer}?')
             self.host_says(host_response)
             self.show_stats_update(event)
+        elif event.event_type == 'PLAYERS_JOINED':
+            for player_json in event.payload['players']:
+                player = PlayerInfo.from_json(player_json)
+                if player.player_id != self.player_id:
+                    self.host_says(f'{player.nick} has joined the game.')
+                    self.show_stats_update(Event(event_type='NEW_PLAYER', player=player, payload={}))
         elif event.event_type in {'NEW_PLAYER', 'PLAYER_LEFT'}:
             nick = event.player.nick
             verb = 'joined' if event.event_type == 'NEW_PLAYER' else 'left'
             self.host_says(f'{nick} has {verb} the game.')
             self.show_stats_update(event)
         elif event.event_type == 'QUESTION_TIMEOUT':
-            self.question_queue.put_nowait(None)
+            self.deliver('question', (None, None))
             self.host_says(f'The correct answer is: {event.payload["answer"]}')
         elif event.event_type == 'CHAT_MESSAGE':
             nick = event.player.nick
             self.player_says(nick, event.payload['message'])
+        elif event.event_type == 'NEW_BOARD':
+            self.host_says('A new board is ready! Enter "/board" to see it.')
+        elif event.event_type == 'FINAL_ROUND':
+            self.show_final_round(Question.from_json(event.payload['question']))
+        elif event.event_type == 'FINAL_RESULTS':
+            self.show_final_results(event)
+            self.show_stats_update(event)
         elif event.event_type == 'NICK_CHANGED':
             update = NickUpdate.from_json(event.payload)
             self.host_says(f'{update.old_nick} is now known as {update.new_nick}')
@@ -460,6 +677,14 @@ class JeopardyApp(ttk.Frame):
         else:
             print(f'[!!] Received unexpected event: {event}')
 
+    def handle_buzz_event(self, event: Event) -> None:
+        is_me = event.player.player_id == self.player_id
+        nick = self.nick if is_me else event.player.nick
+        if event.event_type == 'BUZZ_GRANTED':
+            self.host_says(f'{nick}, you buzzed in first. What is your answer?' if is_me else f'{nick} has buzzed in.')
+        else:
+            self.host_says(f"Sorry, {nick}, time's up.")
+
     def get_status_indicator_color(self) -> str:
         if self.question_timeout is None:
             return self.JEOPARDY_VIOLET
@@ -475,51 +700,140 @@ class JeopardyApp(ttk.Frame):
         # red_value = 0xFF - green_value
         # return f'#{red_value:02X}{green_value:02X}00'
 
+    def wake(self) -> None:
+        try:
+            os.write(self.wakeup_writer, b'\0')
+        except BlockingIOError:
+            pass  # the pipe is full, so a wakeup is already pending
+
+    def on_wakeup(self, fd: int, mask: int) -> None:
+        os.read(fd, 4096)
+        self.tick()
+
+    def on_channel_readable(self, fd: int, mask: int) -> None:
+        self.tick()
+
+    def start_wakeup_handler(self) -> None:
+        try:
+            self.tk.createfilehandler(self.wakeup_reader, tk.READABLE, self.on_wakeup)
+            self.tk.createfilehandler(self.channel.fileno(), tk.READABLE, self.on_channel_readable)
+            self.wakeup_handler_registered = True
+        except (AttributeError, tk.TclError):
+            # file handlers aren't supported everywhere (e.g., on Windows), so fall back to polling there
+            self.wakeup_handler_registered = False
+
     def tick(self) -> None:
-        if not self.question_queue.empty():
-            question = self.question_queue.get_nowait()
+        while not self.callback_queue.empty():
+            callback, result = self.callback_queue.get_nowait()
+            callback(result)
+
+        while not self.local_messages.empty():
+            self.apply_message(*self.local_messages.get_nowait())
+
+        for kind, payload in self.channel.receive(self.MAX_MESSAGES_PER_TICK):
+            self.apply_message(kind, payload)
+
+        self.update_status_indicator()
+        if self.stats_dirty:
+            self.update_stats()
+
+        if self.channel.backlog > 0:
+            # more arrived than one tick handles; let the window redraw before carrying on with the rest
+            self.update_idletasks()
+            if not self.backlog_tick_pending:
+                self.backlog_tick_pending = True
+                self.after(self.BACKLOG_TICK_DELAY_MILLIS, self.on_backlog_tick)
+        elif not self.wakeup_handler_registered and not self.poll_tick_pending:
+            # ticks run from anywhere else must not start a second polling chain alongside this one
+            self.poll_tick_pending = True
+            self.after(self.DEFAULT_TICK_DELAY_MILLIS, self.on_poll_tick)
+
+    def on_backlog_tick(self) -> None:
+        self.backlog_tick_pending = False
+        self.tick()
+
+    def on_poll_tick(self) -> None:
+        self.poll_tick_pending = False
+        self.tick()
+
+    def apply_message(self, kind: str, payload: Any) -> None:
+        if kind == 'question':
+            question, timestamps = payload
             if question is None:
                 self.update_current_question(None)
             else:
+                # trace the question's first line like any other event's
+                self.event_context.timestamps = timestamps
                 self.maybe_update_and_show_question(question)
-
-        while not self.event_queue.empty():
-            event = self.event_queue.get_nowait()
-            self.append_to_event_pane(event)
-
-        while not self.stats_queue.empty():
-            event = self.stats_queue.get_nowait()
-            self.players[event.player.player_id] = event.player
-            if event.event_type == 'NEW_ANSWER':
+                self.event_context.timestamps = None
+        elif kind == 'event':
+            event_parts, timestamps = payload
+            self.append_to_event_pane(event_parts)
+            if timestamps is not None and self.tracer is not None:
+                self.tracer.record(timestamps, displayed=time.time())
+        elif kind == 'stats':
+            self.apply_stats_update(payload)
+
+    def apply_stats_update(self, event: Event) -> None:
+        self.stats_dirty = True
+        if event.event_type == 'FINAL_RESULTS':
+            for result in event.payload['results']:
+                player = PlayerInfo.from_json(result['player'])
+                self.players[player.player_id] = player
                 self.stats.total_answers += 1
-                if event.payload['is_correct']:
+                if result['is_correct']:
                     self.stats.total_correct_answers += 1
-                    self.stats.questions_answered += 1
+            if any(result['is_correct'] for result in event.payload['results']):
+                self.stats.questions_answered += 1
+            return
+        self.players[event.player.player_id] = event.player
+        if event.event_type == 'NEW_ANSWER':
+            self.stats.total_answers += 1
+            if event.payload['is_correct']:
+                self.stats.total_correct_answers += 1
+                self.stats.questions_answered += 1
 
+    def update_status_indicator(self) -> None:
         self.status_canvas.itemconfigure(self.status_indicator, fill=self.get_status_indicator_color())
+        # the countdown only needs to be redrawn while there's a question to count down
+        if self.question_timeout is not None and self.status_update_job is None:
+            self.status_update_job = self.after(self.STATUS_UPDATE_DELAY_MILLIS, self.on_status_update)
 
-        self.update_stats()
-        self.update()
-        self.after(self.DEFAULT_TICK_DELAY_MILLIS, self.tick)
+    def on_status_update(self) -> None:
+        self.status_update_job = None
+        self.update_status_indicator()
 
     def run(self) -> None:
         self.app_process = self.start_app_process()
-        self.register()
-        self.client.start_game()
-        self.fetch_stats()
         self.show_event([
             TaggedText('Welcome to Jeopardy!\n', 'welcome_title'),
             TaggedText(self.WELCOME_TEXT, 'welcome_text'),
         ])
+        # connect in the background so that the window comes up (and stays responsive) while we do
+        self.in_background(self.connect, self.on_connected)
+        self.start_wakeup_handler()
         self.tick()
         self.input_pane.focus_set()
+        super().mainloop()
 
-        with self.lock:
-            if self.current_question_id is None:
-                question = self.client.get_question()
-                self.maybe_update_and_show_question(question)
+    def connect(self) -> Tuple[Optional[GameState], Optional[Question]]:
+        self.register()
+        self.client.start_game()
+        return self.client.get_game_state(), self.client.get_question()
 
-        super().mainloop()
+    def on_connected(self, result: Optional[Tuple[Optional[GameState], Optional[Question]]]) -> None:
+        if result is None:
+            self.host_says(f"Sorry, {self.nick}, I couldn't connect to the server.")
+            return
+        game, question = result
+        if game is not None:
+            self.stats = game.statistics
+            self.players = game.players
+            self.stats_dirty = True
+        if question is not None:
+            with self.lock:
+                if self.current_question_id is None:
+                    self.maybe_update_and_show_question(question)
 
     def start_app_process(self) -> Process:
         app = ClientApp(self.player_id, self)
@@ -540,6 +854,14 @@ class JeopardyApp(ttk.Frame):
         return app_process
 
     def close(self) -> None:
+        self.request_pool.shutdown(wait=False)
+        if self.wakeup_handler_registered:
+            self.tk.deletefilehandler(self.wakeup_reader)
+            self.tk.deletefilehandler(self.channel.fileno())
+        if self.tracer is not None:
+            self.tracer.export()
+        if self.archive is not None:
+            self.archive.close()
         try:
             self.client.close()
         finally:
@@ -548,4 +870,5 @@ class JeopardyApp(ttk.Frame):
                 self.app_process.join()
                 self.app_process.close()
                 print('Client app stopped')
+            self.channel.close()
             self.master.destroy()
@@ -0,0 +1,129 @@
+import random
+import time
+
+from collections import deque
+from threading import Lock
+from typing import Any, Dict, Optional
+
+import requests
+
+from requests.adapters import HTTPAdapter
+
+
+DEFAULT_BACKOFF_SECONDS = 0.1
+DEFAULT_CACHE_SIZE = 500
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_POOL_SIZE = 8
+DEFAULT_RESET_TIMEOUT_SECONDS = 30
+DEFAULT_TIMEOUT_BUDGET_SECONDS = 3.0
+
+
+class CircuitBreaker:
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT_SECONDS) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.lock = Lock()
+
+    def allow_request(self) -> bool:
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                # let a single trial request through; everyone else keeps using the fallback until it succeeds
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self.lock:
+            if self.state != self.CLOSED:
+                print('Upstream question source has recovered, closing circuit breaker')
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f'Upstream question source is failing, opening circuit breaker for {self.reset_timeout}s')
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class UpstreamClient:
+
+    def __init__(self, url: str, timeout_budget: float = DEFAULT_TIMEOUT_BUDGET_SECONDS,
+                 max_retries: int = DEFAULT_MAX_RETRIES, backoff: float = DEFAULT_BACKOFF_SECONDS,
+                 pool_size: int = DEFAULT_POOL_SIZE, cache_size: int = DEFAULT_CACHE_SIZE,
+                 circuit_breaker: Optional[CircuitBreaker] = None) -> None:
+        self.url = url
+        self.timeout_budget = timeout_budget
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.cache = deque(maxlen=cache_size)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get_random_question_data(self, timeout_budget: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        if self.circuit_breaker.allow_request():
+            question_data = self.fetch_with_retries(timeout_budget)
+            if question_data is not None:
+                self.circuit_breaker.record_success()
+                self.cache.append(question_data)
+                return question_data
+            self.circuit_breaker.record_failure()
+        return self.get_cached_question_data()
+
+    def fetch_with_retries(self, timeout_budget: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        # the caller's budget can only shorten this client's own
+        if timeout_budget is None or timeout_budget > self.timeout_budget:
+            timeout_budget = self.timeout_budget
+        deadline = time.monotonic() + timeout_budget
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            question_data = self.fetch(timeout=remaining)
+            if question_data is not None:
+                return question_data
+            # exponential backoff with full jitter, without overrunning the overall budget
+            delay = random.uniform(0, self.backoff * (2 ** attempt))
+            if attempt < self.max_retries and time.monotonic() + delay < deadline:
+                time.sleep(delay)
+        return None
+
+    def fetch(self, timeout: float) -> Optional[Dict[str, Any]]:
+        try:
+            resp = self.session.get(self.url, timeout=timeout)
+            if not resp.ok:
+                print(f'Failed to fetch question from upstream: {resp.status_code}')
+                return None
+            resp_json = resp.json()
+        except (requests.RequestException, ValueError) as e:
+            print(f'Failed to fetch question from upstream: {e!r}')
+            return None
+        if not resp_json or 'question' not in resp_json:
+            return None
+        return resp_json['question']
+
+    def get_cached_question_data(self) -> Optional[Dict[str, Any]]:
+        if not self.cache:
+            return None
+        return random.choice(self.cache)
+
+    def close(self) -> None:
+        self.session.close()
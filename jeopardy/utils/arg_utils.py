@@ -0,0 +1,15 @@
+import argparse
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f'must be a positive integer, not {value}')
+    return number
+
+
+def non_negative_float(value: str) -> float:
+    number = float(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f'must be zero or more, not {value}')
+    return number
@@ -1,3 +1,5 @@
+import math
+
 from functools import wraps
 from typing import Callable, Tuple
 
@@ -25,6 +27,17 @@ def error(message: str, status: int = 500) -> FlaskResponse:
     return jsonify({'error': message, 'status': status}), status
 
 
+def too_many_requests(retry_after: float) -> FlaskResponse:
+    response, status = error('Too many requests, slow down', status=429)
+    # Retry-After only allows whole seconds
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response, status
+
+
+def accepted() -> FlaskResponse:
+    return '', 202
+
+
 def no_content() -> FlaskResponse:
     return '', 204
 
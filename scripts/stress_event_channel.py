@@ -0,0 +1,113 @@
+#!/usr/bin/env python3.7
+
+import argparse
+import select
+import sys
+import threading
+import time
+
+from multiprocessing import Process
+
+from jeopardy.channel import EventChannel
+from jeopardy.tracing import summarize
+from jeopardy.ui import TaggedText
+
+
+def send_events(channel, num_senders, rate, duration):
+    # each sender stands in for one of the client app's request threads, sending paced, numbered events
+    def sender(sender_index):
+        interval = num_senders / rate
+        next_send = time.monotonic()
+        deadline = next_send + duration
+        sequence = 0
+        while next_send < deadline:
+            delay = next_send - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            event_parts = [TaggedText('Host: ', 'host'), f'event {sequence} from sender {sender_index}']
+            channel.send(('event', (event_parts, {'sender': sender_index, 'sequence': sequence, 'sent': time.time()})))
+            sequence += 1
+            next_send += interval
+        channel.send(('done', (sender_index, sequence)))
+
+    threads = [threading.Thread(target=sender, args=(i,)) for i in range(num_senders)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def receive_events(channel, sender_process, num_senders, max_messages, consumer_delay, deadline):
+    next_sequence = [0] * num_senders
+    expected = [None] * num_senders
+    out_of_order = 0
+    latencies = []
+    while None in expected or next_sequence != expected:
+        if time.monotonic() > deadline:
+            print('Timed out waiting for events')
+            break
+        if not sender_process.is_alive() and not select.select([channel.fileno()], [], [], 0)[0] \
+                and channel.backlog == 0:
+            print('The sender process exited before all of its events arrived')
+            break
+        select.select([channel.fileno()], [], [], 1)
+        for kind, payload in channel.receive(max_messages):
+            if kind == 'done':
+                sender_index, count = payload
+                expected[sender_index] = count
+                continue
+            _, timestamps = payload
+            sender_index = timestamps['sender']
+            if timestamps['sequence'] != next_sequence[sender_index]:
+                out_of_order += 1
+            next_sequence[sender_index] = timestamps['sequence'] + 1
+            latencies.append(time.time() - timestamps['sent'])
+        if consumer_delay:
+            # a GUI busy drawing: the senders should slow down rather than lose events
+            time.sleep(consumer_delay)
+    # a sender that never finished only counts the events it's known to have sent
+    sent = sum(count if count is not None else sequence for count, sequence in zip(expected, next_sequence))
+    return sent, None in expected, len(latencies), out_of_order, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Push events through the GUI event channel as fast as asked')
+    parser.add_argument('-n', '--senders', type=int, default=8,
+                        help='The number of sending threads')
+    parser.add_argument('-r', '--rate', type=float, default=5000,
+                        help='The total number of events per second to send')
+    parser.add_argument('-d', '--duration', type=float, default=10,
+                        help='How long (in seconds) to send for')
+    parser.add_argument('-b', '--batch', type=int, default=500,
+                        help='The most messages to receive at once (as the GUI does each tick)')
+    parser.add_argument('-s', '--slow-consumer', type=float, default=0,
+                        help='Seconds to sleep after each receive, to simulate a GUI that has fallen behind')
+    parser.add_argument('-t', '--timeout', type=float, default=60,
+                        help='How long (in seconds) past the duration to wait for the events to arrive')
+    args = parser.parse_args()
+
+    channel = EventChannel()
+    sender_process = Process(target=send_events, args=(channel, args.senders, args.rate, args.duration))
+    start = time.monotonic()
+    sender_process.start()
+    deadline = start + args.duration + args.timeout
+    sent, unfinished, received, out_of_order, latencies = receive_events(
+        channel, sender_process, args.senders, args.batch, args.slow_consumer, deadline
+    )
+    elapsed = time.monotonic() - start
+    sender_process.terminate()
+    sender_process.join()
+    channel.close()
+
+    print(f'Sent {sent:,} events, received {received:,} ({received / elapsed:,.0f}/s) in {elapsed:.2f}s')
+    print(f'Lost: {sent - received:,}, out of order: {out_of_order:,}')
+    if unfinished:
+        print('Some senders never finished, so more events may have been lost than counted')
+    stats = summarize(latencies)
+    print('Latency: ' + ', '.join(f'{key} {stats[key] * 1000:.2f}ms' for key in ('p50', 'p90', 'p99', 'max')))
+    if unfinished or sent != received or out_of_order:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
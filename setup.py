@@ -9,12 +9,18 @@ setup(
     name='jeopardy',
     version='0.5.0',
     packages=find_packages(),
+    package_data={'jeopardy': ['data/*.json']},
     install_requires=requirements,
     python_requires='~=3.7',
     entry_points={
         'console_scripts': [
             'jeopardy = jeopardy.main:main',
             'jeopardyd = jeopardy.server:main',
+            'fake-trivialbuzz = jeopardy.fake_trivialbuzz:main',
+            'jeopardy-import = jeopardy.importer:main',
+            'jeopardy-pack = jeopardy.packed:main',
+            'jeopardy-loadtest = jeopardy.loadtest:main',
+            'jeopardy-replay = jeopardy.replay:main',
         ]
     }
 )